@@ -0,0 +1,103 @@
+import time
+from asyncio import sleep
+
+
+class TokenBucket:
+    """`capacity` requests at once, refilled at `rate` requests per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def available(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def delay(self, now):
+        """Seconds until a token is free; 0 if one is free now."""
+        return max(0.0, (1 - self.available(now)) / self.rate)
+
+    def take(self):
+        self.tokens -= 1
+
+
+class AnimationScheduler:
+    """Plays message-edit animations inside Discord's rate limits.
+
+    Every route (one interaction's original message) has its own budget, and
+    all animations share a global one. Frames that don't fit the budget are
+    dropped; since every frame replaces the whole message, the next frame
+    that does go out carries the latest state. The final frame is never
+    dropped and one token is kept back for it, so results arrive promptly
+    even when the bot is busy. The library's own rate limiter then never has
+    to queue our edits.
+    """
+
+    def __init__(self, route_rate=2.5, route_burst=5, global_rate=25, global_burst=25):
+        self.route_rate = route_rate
+        self.route_burst = route_burst
+        self.routes = {}  # route -> TokenBucket
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def _route(self, route, now):
+        bucket = self.routes.get(route)
+        if bucket is None:
+            if len(self.routes) > 1000:
+                # forget routes whose budget has fully refilled; they'd start full anyway
+                self.routes = {
+                    key: bucket
+                    for key, bucket in self.routes.items()
+                    if bucket.available(now) < bucket.capacity
+                }
+            bucket = self.routes[route] = TokenBucket(self.route_rate, self.route_burst)
+        return bucket
+
+    def _try_take(self, route, reserve=0):
+        now = time.monotonic()
+        bucket = self._route(route, now)
+        if (
+            bucket.available(now) >= 1 + reserve
+            and self.global_bucket.available(now) >= 1 + reserve
+        ):
+            bucket.take()
+            self.global_bucket.take()
+            return True
+        return False
+
+    async def send(self, route, edit):
+        """Send a frame that must arrive, waiting for budget if needed."""
+        while not self._try_take(route):
+            now = time.monotonic()
+            await sleep(
+                max(
+                    self._route(route, now).delay(now),
+                    self.global_bucket.delay(now),
+                    0.01,
+                )
+            )
+        self.frames_sent += 1
+        await edit()
+
+    async def play(self, route, frames, edit, interval=0.05):
+        """Show `frames` in order, at most one every `interval` seconds.
+
+        `edit(frame)` sends one frame. Only the last frame is guaranteed to
+        be shown.
+        """
+        *middle, final = frames
+        for i, frame in enumerate(middle):
+            if i:
+                await sleep(interval)
+            if self._try_take(route, reserve=1):
+                self.frames_sent += 1
+                await edit(frame)
+            else:
+                self.frames_dropped += 1
+        if middle:
+            await sleep(interval)
+        await self.send(route, lambda: edit(final))
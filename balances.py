@@ -0,0 +1,224 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select
+
+from models.user_gold import UserGold
+import wallet
+
+user_gold = UserGold.__table__
+
+
+class WalletWrite:
+    """A transaction that writes one user's wallet; see BalanceCache.transaction."""
+
+    def __init__(self, session, user_id):
+        self.session = session
+        self.user_id = user_id
+        self.balance = None  # the balance after the last write, if any
+
+    async def credit(self, amount, reason):
+        self.balance = await wallet.credit(self.session, self.user_id, amount, reason)
+        return self.balance
+
+    async def debit(self, amount, reason):
+        balance = await wallet.debit(self.session, self.user_id, amount, reason)
+        if balance is not None:
+            self.balance = balance
+        return balance
+
+
+class BalanceCache:
+    """Gold balances served from memory, with credits written behind in batches.
+
+    A credit is queued and counted straight away; a background task commits
+    everything queued in one transaction every `flush_interval` seconds, or
+    sooner once `max_batch` credits are waiting. Debits go through
+    `transaction`, which writes the user's queued credits first in the same
+    transaction, so the balance check in the UPDATE always sees them.
+
+    A balance is the last one read from or written to MySQL plus the credits
+    still queued. If two writes for a user overlap, the stored balance is
+    dropped and read again, rather than guessing which write committed last;
+    likewise a read that raced any write is returned but not stored.
+    """
+
+    def __init__(self, db, flush_interval=0.005, max_batch=200, max_users=10000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_users = max_users
+        # user_id -> balance in MySQL, least recent first
+        self.confirmed = OrderedDict()
+        self.pending = {}  # user_id -> total of credits not yet in MySQL
+        self.queue = {}  # user_id -> [(amount, reason)] waiting to be flushed
+        self.queued = 0
+        self.generation = 0  # writes started so far, across every user
+        self.epochs = {}  # user_id -> generation of their latest write
+        self.writing = {}  # user_id -> writes still open, to know when to drop epochs
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.stopping = False
+        self.commits = 0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        """Let the background task finish its batch, then write out anything still queued.
+
+        The task is never cancelled: a cancel landing while MySQL commits
+        would put credits that were already written back in the queue.
+        """
+        if self.task is not None:
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    async def get(self, user_id):
+        if user_id in self.confirmed:
+            self.confirmed.move_to_end(user_id)
+            return self.confirmed[user_id] + self.pending.get(user_id, 0)
+
+        generation = self.generation
+        async with self.db.session() as session:
+            balance = await session.scalar(
+                select(user_gold.c.gold).where(user_gold.c.user_id == user_id)
+            )
+        balance = balance or 0
+        if self.generation == generation:  # no write raced the read
+            self._confirm(user_id, balance)
+        return balance + self.pending.get(user_id, 0)
+
+    async def credit(self, user_id, amount, reason):
+        """Queue a credit and return the balance including it."""
+        if amount < 0:
+            raise ValueError("credit amount must not be negative")
+        if reason not in wallet.REASONS:
+            raise ValueError(f"Unknown gold ledger reason {reason!r}")
+        self.queue.setdefault(user_id, []).append((amount, reason))
+        self.queued += 1
+        self.pending[user_id] = self.pending.get(user_id, 0) + amount
+        self.wakeup.set()
+        return await self.get(user_id)
+
+    def forget(self, user_id):
+        """Drop a stored balance after writing the wallet outside the cache."""
+        self.generation += 1
+        if user_id in self.epochs:  # an open write must not store its balance
+            self.epochs[user_id] = self.generation
+        self.confirmed.pop(user_id, None)
+
+    @asynccontextmanager
+    async def transaction(self, user_id):
+        """A session for writing one user's wallet, with their queued credits applied first.
+
+        Yields a WalletWrite; wallet changes must go through its credit and
+        debit so the cache learns the new balance once the transaction commits.
+        Runs in the user's lane, after any earlier wallet work for them.
+        """
+        async with self.db.users.lane(user_id):
+            ops = self._take(user_id)
+            epoch = self._begin(user_id)
+            try:
+                async with self.db.session() as session:
+                    write = WalletWrite(session, user_id)
+                    for amount, reason in ops:
+                        await write.credit(amount, reason)
+                    yield write
+            except BaseException:
+                self._requeue(user_id, ops)
+                self._end(user_id)
+                raise
+            self.commits += 1
+            self._finish(user_id, epoch, write.balance, ops)
+
+    async def flush(self):
+        """Commit every queued credit in one transaction."""
+        if not self.queue:
+            return
+        batch, self.queue, self.queued = self.queue, {}, 0
+        epochs = {user_id: self._begin(user_id) for user_id in batch}
+        balances = {}
+        try:
+            async with self.db.session() as session:
+                for user_id, ops in batch.items():
+                    for amount, reason in ops:
+                        balances[user_id] = await wallet.credit(
+                            session, user_id, amount, reason
+                        )
+        except BaseException:
+            for user_id, ops in batch.items():
+                self._requeue(user_id, ops)
+                self._end(user_id)
+            raise
+        self.commits += 1
+        # The batch is committed; one user's bookkeeping failing mustn't strand the rest
+        for user_id, ops in batch.items():
+            try:
+                self._finish(user_id, epochs[user_id], balances[user_id], ops)
+            except Exception as e:
+                print(f"Failed to update cached gold for {user_id}: {e!r}")
+                self.confirmed.pop(user_id, None)
+
+    async def run(self):
+        while not self.stopping:
+            await self.wakeup.wait()
+            if self.queued < self.max_batch and not self.stopping:
+                await asyncio.sleep(self.flush_interval)  # let more credits join
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Failed to flush gold credits, retrying: {e!r}")
+                if not self.stopping:  # close() makes the last attempt itself
+                    await asyncio.sleep(1)
+                    self.wakeup.set()
+
+    def _confirm(self, user_id, balance):
+        self.confirmed[user_id] = balance
+        self.confirmed.move_to_end(user_id)
+        while len(self.confirmed) > self.max_users:
+            self.confirmed.popitem(last=False)
+
+    def _begin(self, user_id):
+        self.generation += 1
+        self.epochs[user_id] = self.generation
+        self.writing[user_id] = self.writing.get(user_id, 0) + 1
+        return self.generation
+
+    def _finish(self, user_id, epoch, balance, ops):
+        try:
+            flushed = sum(amount for amount, _ in ops)
+            if flushed:
+                self.pending[user_id] -= flushed
+                if not self.pending[user_id]:
+                    del self.pending[user_id]
+            if self.epochs.get(user_id) != epoch:
+                self.confirmed.pop(user_id, None)
+            elif balance is not None:
+                self._confirm(user_id, balance)
+        finally:
+            self._end(user_id)
+
+    def _end(self, user_id):
+        self.writing[user_id] -= 1
+        if not self.writing[user_id]:
+            # Nothing open for the user; generations are never reused, so
+            # forgetting their epoch can't make a later write look current
+            del self.writing[user_id]
+            del self.epochs[user_id]
+
+    def _take(self, user_id):
+        ops = self.queue.pop(user_id, [])
+        self.queued -= len(ops)
+        return ops
+
+    def _requeue(self, user_id, ops):
+        if ops:
+            self.queue[user_id] = ops + self.queue.get(user_id, [])
+            self.queued += len(ops)
@@ -1,12 +1,18 @@
 import discord
 from asyncio import Event
 
+from cards import BLACKJACK_VALUE, is_ace, label, labels
 from game import CardGame, GameView
 
+# Shared with simulate.py so the simulator plays the live rules
+DEALER_STANDS_ON = 17
+BLACKJACK_PAYOUT = 2.5  # returned per unit bet, stake included
+WIN_PAYOUT = 2
+
 
 class BlackjackGame(CardGame):
-    def __init__(self, can_double):
-        super().__init__()
+    def __init__(self, can_double, shoe=None):
+        super().__init__(shoe)
         self.player_hand = []
         self.dealer_hand = []
         self.player_stand = False
@@ -25,18 +31,8 @@ class BlackjackGame(CardGame):
 
     def calculate_score(self, hand):
         """Calculates the score of a given hand."""
-        score = 0
-        ace_count = 0
-
-        for card in hand:
-            rank = card.split(" ")[0]
-            if rank in ["J", "Q", "K"]:
-                score += 10
-            elif rank == "A":
-                score += 11
-                ace_count += 1
-            else:
-                score += int(rank)
+        score = sum(BLACKJACK_VALUE[card] for card in hand)
+        ace_count = sum(1 for card in hand if is_ace(card))
 
         while score > 21 and ace_count:
             score -= 10
@@ -46,7 +42,7 @@ class BlackjackGame(CardGame):
 
     def dealer_should_hit(self):
         """Determines if the dealer should hit based on their score."""
-        return self.calculate_score(self.dealer_hand) < 17
+        return self.calculate_score(self.dealer_hand) < DEALER_STANDS_ON
 
     def check_winner(self):
         """Checks for the winner of the game."""
@@ -78,12 +74,12 @@ class BlackjackGame(CardGame):
             title="Blackjack", description="Your move: Hit or Stand?", color=0x005B33
         )
         player_score = self.calculate_score(self.player_hand)
-        dealer_card = self.dealer_hand[0]
+        dealer_card = label(self.dealer_hand[0])
 
         embed.add_field(name="Bet: ", value=str(bet) + " Gold", inline=False)
         embed.add_field(
             name="Your Hand",
-            value=f"{', '.join(self.player_hand)} (Score: {player_score})",
+            value=f"{labels(self.player_hand)} (Score: {player_score})",
             inline=False,
         )
         embed.add_field(name="Dealer's Hand", value=f"{dealer_card}, ?", inline=False)
@@ -93,6 +89,7 @@ class BlackjackGame(CardGame):
 
         view = BlackjackView(self, interaction.user, bet)
         await interaction.response.send_message(embed=embed, view=view)
+        view.track(interaction.client.views, interaction.delete_original_response)
 
         # Await the game result after the game is finished
         res, did_double = await view.wait_for_game_result()
@@ -111,7 +108,7 @@ class BlackjackView(GameView):
 
     async def update_game_state(self, interaction: discord.Interaction):
         player_score = self.game.calculate_score(self.game.player_hand)
-        dealer_card = self.game.dealer_hand[0]
+        dealer_card = label(self.game.dealer_hand[0])
 
         embed = discord.Embed(
             title="Blackjack", description="Your move: Hit or Stand?", color=0x005B33
@@ -119,7 +116,7 @@ class BlackjackView(GameView):
         embed.add_field(name="Bet: ", value=str(self.bet) + " Gold", inline=False)
         embed.add_field(
             name="Your Hand",
-            value=f"{', '.join(self.game.player_hand)} (Score: {player_score})",
+            value=f"{labels(self.game.player_hand)} (Score: {player_score})",
             inline=False,
         )
         embed.add_field(name="Dealer's Hand", value=f"{dealer_card}, ?", inline=False)
@@ -132,7 +129,7 @@ class BlackjackView(GameView):
             embed.set_field_at(
                 2,
                 name="Dealer's Hand",
-                value=f"{', '.join(self.game.dealer_hand)} (Score: {dealer_score})",
+                value=f"{labels(self.game.dealer_hand)} (Score: {dealer_score})",
                 inline=False,
             )
 
@@ -143,18 +140,19 @@ class BlackjackView(GameView):
             # Set the result value once the game is over
             self.result_value = self.check_winner()[1]  # Get the result value
 
+            self.end()  # delete the message in 60 seconds
             self.event.set()  # Signal that the game is over
 
-        await interaction.response.edit_message(embed=embed, view=self, delete_after=60)
+        await interaction.response.edit_message(embed=embed, view=self)
 
     async def wait_for_game_result(self):
         """Wait until the game is over and return the amount gained."""
         await self.event.wait()  # Wait for the event to be set when the game ends
 
         if self.result_value == 3:
-            return self.bet * 2.5, self.did_double
+            return self.bet * BLACKJACK_PAYOUT, self.did_double
         elif self.result_value == 0:
-            return self.bet * 2, self.did_double
+            return self.bet * WIN_PAYOUT, self.did_double
         elif self.result_value == 1:
             return self.bet * -1, self.did_double
         return 0, self.did_double
@@ -162,6 +160,17 @@ class BlackjackView(GameView):
     def check_winner(self):
         return self.game.check_winner()
 
+    async def on_timeout(self):
+        # An abandoned hand stands and the dealer plays out, so walking away
+        # (or being evicted) can't be used as a free surrender
+        if not self.game.game_over:
+            self.game.player_stand = True
+            while self.game.dealer_should_hit():
+                self.game.hit(self.game.dealer_hand)
+            self.game.game_over = True
+            self.result_value = self.check_winner()[1]
+            self.event.set()
+
     @discord.ui.button(label="Hit", style=discord.ButtonStyle.primary)
     async def hit_button(
         self, interaction: discord.Interaction, button: discord.Button
@@ -0,0 +1,38 @@
+"""Cards as small integers, with lookup tables for everything the games need.
+
+A card is 0-51: `card % 13` is the rank (0 is a two, 12 an ace) and
+`card // 13` the suit. Scoring is a table lookup; text is only made when a
+card is shown in an embed.
+"""
+
+SUITS = ["♥", "♦", "♣", "♠"]
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+DECK_SIZE = len(SUITS) * len(RANKS)
+ACE = len(RANKS) - 1
+
+# Blackjack value of each card, aces counted as 11
+BLACKJACK_VALUE = bytes(
+    min(rank + 2, 10) if rank != ACE else 11
+    for _ in SUITS
+    for rank in range(len(RANKS))
+)
+# High-low rank of each card, 2 up to 14 for an ace
+HIGHLOW_RANK = bytes(rank + 2 for _ in SUITS for rank in range(len(RANKS)))
+
+
+def new_deck():
+    """A standard deck in order, as a bytearray of cards."""
+    return bytearray(range(DECK_SIZE))
+
+
+def is_ace(card):
+    return card % 13 == ACE
+
+
+def label(card):
+    """Text for one card, e.g. "10 ♥"."""
+    return f"{RANKS[card % 13]} {SUITS[card // 13]}"
+
+
+def labels(hand):
+    return ", ".join(label(card) for card in hand)
@@ -0,0 +1,120 @@
+from sqlalchemy import and_, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models.casino_result import CasinoResult
+from models.casino_rollup import CasinoRollupDaily, CasinoRollupHourly
+from models.casino_spent_earned import CasinoSpentEarned
+from rng import audit_values
+
+casino_results = CasinoResult.__table__
+rollup_hourly = CasinoRollupHourly.__table__
+rollup_daily = CasinoRollupDaily.__table__
+casino_spent_earned = CasinoSpentEarned.__table__
+
+PERIODS = ["day", "week", "month", "all"]
+METRICS = ["net", "wagered", "biggest_win"]
+
+
+def _rollup_upsert(table, bucket, user_id, wagered, payout):
+    net = payout - wagered
+    stmt = mysql_insert(table).values(
+        **bucket,
+        user_id=user_id,
+        games=1,
+        wagered=wagered,
+        payout=payout,
+        net=net,
+        biggest_win=net,
+    )
+    return stmt.on_duplicate_key_update(
+        games=table.c.games + 1,
+        wagered=table.c.wagered + wagered,
+        payout=table.c.payout + payout,
+        net=table.c.net + net,
+        biggest_win=func.greatest(table.c.biggest_win, net),
+    )
+
+
+async def record_result(conn, user_id, game, wagered, payout, stream=None):
+    """Log a settled game and fold it into the hourly and daily rollups.
+
+    `stream` is the RandomStream that decided the game, stored for replays.
+    """
+    await conn.execute(
+        insert(casino_results).values(
+            user_id=user_id,
+            game=game,
+            wagered=wagered,
+            payout=payout,
+            **(audit_values(stream) if stream is not None else {}),
+        )
+    )
+    hour = func.date_format(func.now(), "%Y-%m-%d %H:00:00")
+    await conn.execute(
+        _rollup_upsert(rollup_hourly, {"bucket_start": hour}, user_id, wagered, payout)
+    )
+    await conn.execute(
+        _rollup_upsert(
+            rollup_daily, {"bucket_day": func.curdate()}, user_id, wagered, payout
+        )
+    )
+
+
+def _window_query(period, metric):
+    """Return (query, value column) ranking users over one leaderboard period."""
+    if period == "all":
+        table = casino_spent_earned
+        value = {
+            "net": table.c.total_earned + table.c.total_spent,
+            "wagered": -table.c.total_spent,
+            "biggest_win": table.c.biggest_win,
+        }[metric]
+        return select(table.c.user_id, value.label("value")), value
+
+    if period == "day":
+        table = rollup_hourly
+        window = table.c.bucket_start > func.date_sub(
+            func.now(), literal_column("INTERVAL 24 HOUR")
+        )
+    else:
+        table = rollup_daily
+        days = 7 if period == "week" else 30
+        window = table.c.bucket_day > func.subdate(func.curdate(), days)
+
+    value = {
+        "net": func.sum(table.c.net),
+        "wagered": func.sum(table.c.wagered),
+        "biggest_win": func.max(table.c.biggest_win),
+    }[metric]
+    query = (
+        select(table.c.user_id, value.label("value"))
+        .where(window)
+        .group_by(table.c.user_id)
+    )
+    return query, value
+
+
+async def top_players(conn, period, metric, after=None, limit=10):
+    """Return one page of [(user_id, value)], best first.
+
+    Pages are keyset paginated: pass the last (value, user_id) of the previous
+    page as `after`, so later pages cost the same as the first.
+    """
+    query, value = _window_query(period, metric)
+    user_id = query.selected_columns.user_id
+    conditions = []
+    if metric == "biggest_win":
+        conditions.append(value > 0)
+    if after is not None:
+        last_value, last_user_id = after
+        conditions.append(
+            or_(value < last_value, and_(value == last_value, user_id < last_user_id))
+        )
+    if conditions:
+        if period == "all":
+            query = query.where(*conditions)
+        else:
+            query = query.having(and_(*conditions))
+
+    query = query.order_by(value.desc(), user_id.desc()).limit(limit)
+    return [(row.user_id, int(row.value)) for row in await conn.execute(query)]
@@ -0,0 +1,173 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from balances import BalanceCache
+from executor import UserExecutor
+from models.casino_spent_earned import CasinoSpentEarned
+from models.submissions import Submission
+from models.user_gold import UserGold
+from models.user_inventory import UserInventory
+import casino_stats
+import inventory
+import ledger
+import rng
+import streaks
+
+casino_spent_earned = CasinoSpentEarned.__table__
+
+
+def upsert_casino_totals(user_id, amount_spent=0, amount_earned=0, biggest_win=0):
+    """Build a single-statement upsert that adds to a user's casino totals.
+
+    The new total_earned comes back as the result's lastrowid (see wallet.py).
+    """
+    return (
+        insert(casino_spent_earned)
+        .values(
+            user_id=user_id,
+            total_spent=amount_spent,
+            total_earned=func.last_insert_id(amount_earned),
+            biggest_win=max(biggest_win, 0),
+        )
+        .on_duplicate_key_update(
+            total_spent=func.coalesce(casino_spent_earned.c.total_spent, 0)
+            + amount_spent,
+            total_earned=func.last_insert_id(
+                func.coalesce(casino_spent_earned.c.total_earned, 0) + amount_earned
+            ),
+            biggest_win=func.greatest(casino_spent_earned.c.biggest_win, biggest_win),
+        )
+    )
+
+
+def async_database_url(url):
+    """Swap the configured MySQL driver for its asyncio counterpart."""
+    url = make_url(url)
+    if url.get_backend_name() == "mysql":
+        url = url.set(drivername="mysql+aiomysql")
+    return url
+
+
+class Database:
+    """Async data access layer; every operation runs in its own pooled session."""
+
+    def __init__(self, url, echo=False, pool_size=10, max_overflow=20):
+        self.engine = create_async_engine(
+            async_database_url(url),
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=True,  # MySQL drops idle connections after wait_timeout
+            pool_recycle=3600,
+        )
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        # Wallet and inventory writes for one user run one at a time
+        self.users = UserExecutor()
+        self.balances = BalanceCache(self)
+
+    @asynccontextmanager
+    async def session(self):
+        """Yield a session wrapped in a transaction; commits on success, rolls back on error."""
+        async with self.Session() as session:
+            async with session.begin():
+                yield session
+
+    async def close(self):
+        await self.balances.close()  # write out queued credits first
+        await self.engine.dispose()
+
+    async def add_gold(self, user_id, amount=1, reason="submission"):
+        # Queue the credit (and its ledger entry) and return the updated total
+        async with self.users.lane(user_id):
+            return await self.balances.credit(user_id, amount, reason)
+
+    async def get_gold(self, user_id):
+        return await self.balances.get(user_id)
+
+    async def get_gold_history(self, user_id, limit=20):
+        # Most recent ledger entries first, for checking where gold went
+        async with self.session() as session:
+            return await ledger.history(session, user_id, limit)
+
+    async def check_gold_ledger(self, user_id):
+        """Return (stored balance, balance replayed from the ledger); they should match.
+
+        Runs as a wallet transaction so the user's queued credits are written
+        first and both numbers are read from the same state.
+        """
+        async with self.balances.transaction(user_id) as write:
+            stored = await write.session.scalar(
+                select(UserGold.gold).where(UserGold.user_id == user_id)
+            )
+            replayed = await ledger.replay_balance(write.session, user_id)
+        return stored or 0, replayed
+
+    async def deduct_gold(self, user_id, amount, reason="admin"):
+        """Deduct gold if the user has enough; returns the new balance or None."""
+        async with self.balances.transaction(user_id) as write:
+            return await write.debit(amount, reason)
+
+    async def top_casino_players(self, period, metric, after=None, limit=10):
+        async with self.session() as session:
+            return await casino_stats.top_players(
+                session, period, metric, after=after, limit=limit
+            )
+
+    async def has_submitted(self, message_id):
+        # Check if the image has already been submitted for gold
+        async with self.session() as session:
+            return await session.get(Submission, message_id) is not None
+
+    async def track_submission(self, message_id, author_id):
+        # Track the submission with the author's ID and advance their streak
+        async with self.session() as session:
+            session.add(Submission(message_id=message_id, user_id=author_id))
+            await streaks.record_submission(session, author_id)
+
+    async def count_submissions_today(self, user_id):
+        async with self.session() as session:
+            return await streaks.count_submissions_today(session, user_id)
+
+    async def get_streak(self, user_id):
+        async with self.session() as session:
+            return await streaks.get_streak(session, user_id)
+
+    async def fetch_submissions(self, user_id):
+        # Fetch all submissions by the user
+        async with self.session() as session:
+            result = await session.scalars(
+                select(Submission).where(Submission.user_id == user_id)
+            )
+            return result.all()
+
+    async def get_inventory(self, user_id):
+        # Get the user's inventory with role IDs instead of names
+        async with self.session() as session:
+            result = await session.execute(
+                select(UserInventory.role_id, UserInventory.quantity).where(
+                    UserInventory.user_id == user_id
+                )
+            )
+            return result.all()
+
+    async def combine_roles(self, user_id, guild_id, role_id, next_role_id, stream):
+        """Spend 10 of a role on a 10% chance at `next_role_id`, in one transaction.
+
+        The removal, the audited draw and the reward commit together, like a
+        roll. Returns None if the user has fewer than 10 of the role,
+        otherwise whether they got the higher role (False if there is none).
+        """
+        async with self.users.lane(user_id), self.session() as session:
+            if not await inventory.remove_items(session, user_id, role_id, 10):
+                return None
+            if next_role_id is None:
+                return False
+            upgraded = stream.random() < 0.1
+            await rng.record_audit(session, user_id, guild_id, "combine", 10, stream)
+            if upgraded:
+                await inventory.add_items(session, user_id, {next_role_id: 1})
+            return upgraded
@@ -0,0 +1,15 @@
+async def equip_role(registry, member, role):
+    """Swap the member's cosmetic role for `role` with at most one member edit.
+
+    Every other role the member has is kept. Returns False without calling
+    Discord if the member already wears exactly this cosmetic role.
+    """
+    guild = member.guild
+    current = set(member.roles)
+    current.discard(guild.default_role)  # @everyone can't be assigned
+    cosmetic = {held for held in current if registry.lookup(guild.id, held.id)}
+    target = (current - cosmetic) | {role}
+    if target == current:
+        return False
+    await member.edit(roles=list(target), reason="Equipped cosmetic role")
+    return True
@@ -0,0 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Lane:
+    """One user's place in line: a FIFO lock and the jobs holding or waiting on it."""
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    owner: asyncio.Task = None
+    jobs: int = 0
+
+
+class UserExecutor:
+    """Runs everything that touches one user's wallet or inventory in order.
+
+    Each user with work in flight has a lane; jobs for the same user take
+    turns in arrival order, while different users never wait on each other.
+    A lane is dropped as soon as its last job leaves, so memory follows the
+    users active right now rather than everyone who has ever played.
+
+    Lanes are reentrant within a task: a command can hold its user's lane
+    across several steps that each take the lane themselves.
+    """
+
+    def __init__(self):
+        self.lanes = {}  # user_id -> Lane
+
+    def __len__(self):
+        return len(self.lanes)
+
+    @asynccontextmanager
+    async def lane(self, user_id):
+        task = asyncio.current_task()
+        lane = self.lanes.get(user_id)
+        if lane is not None and lane.owner is task:
+            yield  # already ours further up the call stack
+            return
+
+        if lane is None:
+            lane = self.lanes[user_id] = Lane()
+        lane.jobs += 1
+        try:
+            async with lane.lock:
+                lane.owner = task
+                try:
+                    yield
+                finally:
+                    lane.owner = None
+        finally:
+            lane.jobs -= 1
+            if not lane.jobs:
+                del self.lanes[user_id]
@@ -1,29 +1,41 @@
-import random
 import discord
 
+from shoe import Shoe
 
-class CardGame:
-    def __init__(self):
-        self.deck = self.create_deck()
-        random.shuffle(self.deck)
 
-    def create_deck(self):
-        """Creates a standard deck of cards."""
-        suits = ["♥", "♦", "♣", "♠"]
-        ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
-        return [f"{rank} {suit}" for suit in suits for rank in ranks]
+class CardGame:
+    def __init__(self, shoe=None):
+        # Pre-shuffled shoes come from the client's ShoePool
+        self.shoe = shoe if shoe is not None else Shoe(decks=1)
 
     def deal_card(self):
-        """Deals a card from the deck."""
-        return self.deck.pop() if self.deck else None
+        """Deals a card from the shoe."""
+        return self.shoe.deal()
 
 
 class GameView(discord.ui.View):
     def __init__(self, game, player, bet):
-        super().__init__()
+        super().__init__(timeout=None)  # idle expiry is handled by the ViewRegistry
         self.game = game
         self.player = player
         self.bet = bet
+        self.views = None
+
+    def track(self, views, delete):
+        """Register with the ViewRegistry; `delete` removes the game message."""
+        self.views = views
+        views.track(self, self.player.id, delete, kind="game")
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Every move by the player pushes expiry back
+        if self.views is not None and interaction.user == self.player:
+            self.views.touch(self)
+        return True
+
+    def end(self, delay=60):
+        """Release the view and delete the game message after `delay` seconds."""
+        if self.views is not None:
+            self.views.release(self, delay)
 
     async def update_game_state(self, interaction: discord.Interaction):
         """Abstract method to update the game state; to be implemented in subclasses."""
@@ -1,13 +1,16 @@
 import discord
 from asyncio import Event
+from cards import HIGHLOW_RANK, label
 from game import CardGame, GameView
 
+POT_GROWTH = 1.25  # pot multiplier per correct guess, shared with simulate.py
+
 
 class HigherLower(CardGame):
-    def __init__(self):
-        super().__init__()
-        self.player_hand = ""  # face down card
-        self.dealer_hand = ""  # face up card
+    def __init__(self, shoe=None):
+        super().__init__(shoe)
+        self.player_hand = None  # face down card
+        self.dealer_hand = None  # face up card
         self.game_over = False
 
     def deal_initial_cards(self):
@@ -34,20 +37,7 @@ class HigherLower(CardGame):
                 return 0  # loss
 
     def get_value(self, card):
-        rank = card.split(" ")[0]
-        value = 0
-
-        if rank == "J":
-            value += 11
-        elif rank == "Q":
-            value += 12
-        elif rank == "K":
-            value += 13
-        elif rank == "A":
-            value += 14
-        else:
-            value += int(rank)
-        return value
+        return HIGHLOW_RANK[card]
 
     async def start_game(self, interaction: discord.Interaction, bet: int):
         self.deal_initial_cards()
@@ -58,12 +48,15 @@ class HigherLower(CardGame):
         embed.add_field(
             name="Pot (25% per win): ", value=str(bet) + " gold", inline=False
         )
-        embed.add_field(name="Dealer's card: ", value=self.dealer_hand, inline=False)
+        embed.add_field(
+            name="Dealer's card: ", value=label(self.dealer_hand), inline=False
+        )
         embed.add_field(name="Your card: ", value="?", inline=False)
         embed.add_field(name="Current Streak: ", value="0", inline=False)
 
         view = HigherLowerView(self, interaction.user, bet)
         await interaction.response.send_message(embed=embed, view=view)
+        view.track(interaction.client.views, interaction.delete_original_response)
 
         # Await the game result after the game is finished
         await view.wait_for_game_result()
@@ -83,6 +76,7 @@ class HigherLowerView(GameView):
 
     def end_game(self):  # assumes pot is valid number
         self.clear_items()
+        self.end()  # delete the message in 60 seconds
         self.event.set()
 
     async def update_game_state(self, interaction: discord.Interaction):
@@ -106,7 +100,7 @@ class HigherLowerView(GameView):
             name="Pot (25% per win): ", value=str(int(self.pot)) + " Gold", inline=False
         )
         embed.add_field(
-            name="Dealer's card: ", value=self.game.dealer_hand, inline=False
+            name="Dealer's card: ", value=label(self.game.dealer_hand), inline=False
         )
         embed.add_field(name="Your card: ", value="?", inline=False)
         embed.add_field(name="Current Streak: ", value=self.streak, inline=False)
@@ -115,12 +109,12 @@ class HigherLowerView(GameView):
 
         if self.result_value is not None:
             embed.set_field_at(
-                2, name="Your card: ", value=self.game.player_hand, inline=False
+                2, name="Your card: ", value=label(self.game.player_hand), inline=False
             )
 
             if self.result_value == 1:
                 game_result_text = "You Win!"
-                self.pot = self.pot * 1.25  # keep as float until cash out
+                self.pot = self.pot * POT_GROWTH  # keep as float until cash out
                 self.streak += 1
                 embed.set_field_at(
                     0,
@@ -142,7 +136,7 @@ class HigherLowerView(GameView):
 
             embed.add_field(name="Result", value=game_result_text, inline=False)
 
-        await interaction.response.edit_message(embed=embed, view=self, delete_after=60)
+        await interaction.response.edit_message(embed=embed, view=self)
 
     def add_higher_lower_buttons(self):
         self.clear_items()  # Clear existing buttons before adding new ones
@@ -223,6 +217,13 @@ class HigherLowerView(GameView):
             interaction
         )  # Update game state to reflect the new round
 
+    async def on_timeout(self):
+        # An abandoned game cashes out whatever is in the pot
+        if not self.event.is_set():
+            self.result_value = 3
+            self.pot = int(self.pot)
+            self.event.set()
+
     async def wait_for_game_result(self):
         await self.event.wait()  # Wait for the game to finish
         return self.result_value
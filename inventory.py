@@ -0,0 +1,51 @@
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.mysql import insert
+
+from models.user_inventory import UserInventory
+
+user_inventory = UserInventory.__table__
+
+
+async def add_items(conn, user_id, quantities):
+    """Add {role_id: quantity} to a user's inventory with one multi-row upsert."""
+    rows = [
+        {"user_id": user_id, "role_id": role_id, "quantity": quantity}
+        for role_id, quantity in quantities.items()
+        if quantity > 0
+    ]
+    if not rows:
+        return
+    stmt = insert(user_inventory).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+        quantity=func.coalesce(user_inventory.c.quantity, 0) + stmt.inserted.quantity
+    )
+    await conn.execute(stmt)
+
+
+async def remove_items(conn, user_id, role_id, quantity):
+    """Take `quantity` of a role out of the inventory; False if the user has too few."""
+    result = await conn.execute(
+        update(user_inventory)
+        .where(
+            user_inventory.c.user_id == user_id,
+            user_inventory.c.role_id == role_id,
+            user_inventory.c.quantity >= quantity,
+        )
+        .values(quantity=user_inventory.c.quantity - quantity)
+    )
+    return result.rowcount == 1
+
+
+async def move_role(conn, old_role_id, new_role_id):
+    """Move every user's stock of one role onto another, merging with what they hold."""
+    held = select(
+        user_inventory.c.user_id, literal(new_role_id), user_inventory.c.quantity
+    ).where(user_inventory.c.role_id == old_role_id)
+    stmt = insert(user_inventory).from_select(["user_id", "role_id", "quantity"], held)
+    stmt = stmt.on_duplicate_key_update(
+        quantity=func.coalesce(user_inventory.c.quantity, 0) + stmt.inserted.quantity
+    )
+    await conn.execute(stmt)
+    await conn.execute(
+        delete(user_inventory).where(user_inventory.c.role_id == old_role_id)
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+import discord
+from sqlalchemy import select
+
+from models.casino_spent_earned import CasinoSpentEarned
+
+casino_spent_earned = CasinoSpentEarned.__table__
+
+
+@dataclass
+class LeaderboardEntry:
+    user_id: int
+    total_spent: int | None  # None until read back for a user new to the board
+    total_earned: int
+
+
+class CasinoLeaderboard:
+    """Top casino earners, kept in memory and updated as games settle.
+
+    total_earned only ever grows, so a user can enter the top N but never fall
+    out except by being overtaken. That keeps the in-memory board exact
+    without re-querying after every game.
+    """
+
+    def __init__(self, db, size=10):
+        self.db = db
+        self.size = size
+        self.entries = []  # sorted by total_earned, highest first
+
+    async def load(self):
+        """Read the current top N from the database."""
+        async with self.db.session() as session:
+            rows = (
+                await session.execute(
+                    select(casino_spent_earned)
+                    .order_by(casino_spent_earned.c.total_earned.desc())
+                    .limit(self.size)
+                )
+            ).all()
+        self.entries = [
+            LeaderboardEntry(row.user_id, row.total_spent, row.total_earned)
+            for row in rows
+        ]
+
+    def record(self, user_id, amount_spent, amount_earned, total_earned):
+        """Apply one settled game; `total_earned` is the user's new stored total."""
+        for entry in self.entries:
+            if entry.user_id == user_id:
+                if entry.total_spent is not None:
+                    entry.total_spent += amount_spent
+                entry.total_earned = total_earned
+                break
+        else:
+            if len(self.entries) >= self.size and (
+                total_earned <= self.entries[-1].total_earned
+            ):
+                return
+            self.entries.append(LeaderboardEntry(user_id, None, total_earned))
+        self.entries.sort(key=lambda entry: entry.total_earned, reverse=True)
+        del self.entries[self.size :]
+
+    async def top(self):
+        """Return the top N, reading total_spent only for users new to the board."""
+        missing = [entry for entry in self.entries if entry.total_spent is None]
+        if missing:
+            async with self.db.session() as session:
+                rows = await session.execute(
+                    select(
+                        casino_spent_earned.c.user_id, casino_spent_earned.c.total_spent
+                    ).where(
+                        casino_spent_earned.c.user_id.in_(
+                            [entry.user_id for entry in missing]
+                        )
+                    )
+                )
+                spent = dict(rows.all())
+            for entry in missing:
+                entry.total_spent = spent.get(entry.user_id, 0)
+        return list(self.entries)
+
+
+class UserNameCache:
+    """Display names by user ID with a TTL; misses are fetched concurrently."""
+
+    def __init__(self, client, ttl=600):
+        self.client = client
+        self.ttl = ttl
+        self.names = {}  # user_id -> (display_name, expires_at)
+
+    async def resolve(self, user_ids):
+        now = time.monotonic()
+        missing = []
+        for user_id in user_ids:
+            cached = self.names.get(user_id)
+            if cached and cached[1] > now:
+                continue
+            user = self.client.get_user(user_id)  # gateway cache, no REST call
+            if user:
+                self.names[user_id] = (user.display_name, now + self.ttl)
+            else:
+                missing.append(user_id)
+
+        if len(self.names) > 1000:
+            # drop expired names so the cache doesn't grow with every user ever shown
+            self.names = {
+                user_id: cached
+                for user_id, cached in self.names.items()
+                if cached[1] > now
+            }
+
+        if missing:
+            users = await asyncio.gather(
+                *(self.client.fetch_user(user_id) for user_id in missing),
+                return_exceptions=True,
+            )
+            for user_id, user in zip(missing, users):
+                if isinstance(user, discord.NotFound):
+                    name = f"Unknown user {user_id}"
+                elif isinstance(user, Exception):
+                    continue  # try again next time
+                else:
+                    name = user.display_name
+                self.names[user_id] = (name, now + self.ttl)
+
+        return {
+            user_id: self.names[user_id][0] if user_id in self.names else str(user_id)
+            for user_id in user_ids
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.dialects.mysql import insert
+
+from models.gold_ledger import GoldLedger
+from models.gold_snapshot import GoldSnapshot
+
+gold_ledger = GoldLedger.__table__
+gold_snapshots = GoldSnapshot.__table__
+
+
+async def history(conn, user_id, limit=20):
+    """Return a user's most recent ledger entries, newest first."""
+    return (
+        await conn.execute(
+            select(gold_ledger)
+            .where(gold_ledger.c.user_id == user_id)
+            .order_by(gold_ledger.c.id.desc())
+            .limit(limit)
+        )
+    ).all()
+
+
+async def replay_balance(conn, user_id):
+    """Rebuild a balance from the user's snapshot plus the entries after it.
+
+    This should always equal user_gold.gold; a mismatch means the two drifted.
+    """
+    snapshot = (
+        await conn.execute(
+            select(gold_snapshots.c.balance, gold_snapshots.c.last_entry_id).where(
+                gold_snapshots.c.user_id == user_id
+            )
+        )
+    ).first()
+    balance, last_entry_id = snapshot if snapshot else (0, 0)
+    change = await conn.scalar(
+        select(func.coalesce(func.sum(gold_ledger.c.amount), 0)).where(
+            gold_ledger.c.user_id == user_id, gold_ledger.c.id > last_entry_id
+        )
+    )
+    return balance + int(change)
+
+
+def _fold(low, high):
+    """Upsert each user's snapshot with their last entry in the id range (low, high]."""
+    in_range = (gold_ledger.c.id > low) & (gold_ledger.c.id <= high)
+    folded = (
+        select(
+            gold_ledger.c.user_id,
+            func.max(gold_ledger.c.id).label("last_id"),
+            func.count().label("entries"),
+        )
+        .where(in_range)
+        .group_by(gold_ledger.c.user_id)
+        .subquery("folded")
+    )
+    latest = select(
+        gold_ledger.c.user_id,
+        gold_ledger.c.balance_after,
+        gold_ledger.c.id,
+        folded.c.entries,
+        func.now(),
+    ).join(folded, gold_ledger.c.id == folded.c.last_id)
+    stmt = insert(gold_snapshots).from_select(
+        ["user_id", "balance", "last_entry_id", "entries", "updated_at"], latest
+    )
+    return stmt.on_duplicate_key_update(
+        balance=stmt.inserted.balance,
+        last_entry_id=stmt.inserted.last_entry_id,
+        entries=gold_snapshots.c.entries + stmt.inserted.entries,
+        updated_at=func.now(),
+    )
+
+
+async def compact(db, older_than_days=30, batch_size=5000):
+    """Fold ledger entries older than `older_than_days` into per-user snapshots.
+
+    Works through the old entries in id ranges of `batch_size`, one
+    transaction each: the snapshots are moved forward and the folded rows
+    deleted together. The ledger then only holds recent history, and
+    replay_balance still adds up. Returns the number of entries folded.
+    """
+    async with db.session() as session:
+        upper = await session.scalar(
+            select(func.max(gold_ledger.c.id)).where(
+                gold_ledger.c.inserted_at
+                < func.date_sub(
+                    func.now(), literal_column(f"INTERVAL {int(older_than_days)} DAY")
+                )
+            )
+        )
+        low = await session.scalar(select(func.min(gold_ledger.c.id)))
+    if upper is None:
+        return 0
+
+    folded = 0
+    low -= 1
+    while low < upper:
+        high = min(low + batch_size, upper)
+        async with db.session() as session:
+            await session.execute(_fold(low, high))
+            result = await session.execute(
+                delete(gold_ledger).where(
+                    gold_ledger.c.id > low, gold_ledger.c.id <= high
+                )
+            )
+            folded += result.rowcount
+        low = high
+    return folded
+
+
+async def main():
+    from database import Database
+
+    load_dotenv()
+    db = Database(os.getenv("DATABASE_URL"))
+    try:
+        folded = await compact(db)
+        print(f"Folded {folded} gold ledger entries into snapshots")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
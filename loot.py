@@ -0,0 +1,179 @@
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+
+from models.loot_tier import LootTier
+from role_registry import ROLE_DEFINITIONS
+
+loot_tiers = LootTier.__table__
+
+# Odds used until a guild configures its own table: (rarity, weight), lowest tier first
+DEFAULT_TIERS = [
+    ("Common", 50.0),
+    ("Rare", 30.0),
+    ("Epic", 19.0),
+    ("Legendary", 1.0),
+]
+
+
+class AliasSampler:
+    """Walker/Vose alias table: draws an index with the given weights in O(1)."""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # whatever is left over is 1.0 up to rounding error, so prob stays 1
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng):
+        i = rng.integers(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+    def sample_many(self, rng, size):
+        """Draw `size` indices at once; still O(1) work per draw."""
+        i = rng.integers(len(self.prob), size=size)
+        return np.where(rng.random(size) < self.prob[i], i, self.alias[i])
+
+
+class LootTable:
+    """A guild's tiers and roles compiled into one sampler over roles.
+
+    A role's weight is its tier's weight split evenly over the tier's roles.
+    Tiers with no roles or no weight are skipped.
+    """
+
+    def __init__(self, tiers, items):
+        self.tiers = tiers
+        self.roles = []
+        self.rarities = []  # the tier of each role in self.roles
+        weights = []
+        for rarity, weight in tiers:
+            role_list = items.get(rarity)
+            if not role_list or weight <= 0:
+                continue
+            for role in role_list:
+                self.roles.append(role)
+                self.rarities.append(rarity)
+                weights.append(weight / len(role_list))
+
+        self.probabilities = np.asarray(weights, dtype=float)
+        if self.roles:
+            self.probabilities /= self.probabilities.sum()
+            self.sampler = AliasSampler(self.probabilities)
+
+    def odds(self):
+        """Each tier's real chance per roll, in tier order; skipped tiers get 0."""
+        chances = dict.fromkeys((rarity for rarity, _ in self.tiers), 0.0)
+        for rarity, probability in zip(self.rarities, self.probabilities):
+            chances[rarity] += float(probability)
+        return list(chances.items())
+
+    def roll(self, rng):
+        """Roll a single role, or None if the table has nothing to give."""
+        if not self.roles:
+            return None
+        return self.roles[self.sampler.sample(rng)]
+
+    def roll_many(self, rng, amount):
+        """Roll `amount` roles at once; returns {role: count}."""
+        if not self.roles or amount <= 0:
+            return {}
+        if amount < len(self.roles):
+            # fewer draws than roles: per-draw alias lookups are cheapest
+            counts = np.bincount(
+                self.sampler.sample_many(rng, amount), minlength=len(self.roles)
+            )
+        else:
+            # one multinomial draw costs the same however many rolls there are
+            counts = rng.multinomial(amount, self.probabilities)
+        return {role: int(count) for role, count in zip(self.roles, counts) if count}
+
+
+class LootTables:
+    """Per-guild loot tables, read from the database and compiled once per change."""
+
+    def __init__(self, db):
+        self.db = db
+        self.tiers = {}  # guild_id -> [(rarity, weight)] as stored in the database
+        self.compiled = {}  # guild_id -> (roles signature, LootTable)
+
+    async def get_tiers(self, guild_id):
+        if guild_id not in self.tiers:
+            async with self.db.session() as session:
+                rows = (
+                    await session.execute(
+                        select(loot_tiers.c.rarity, loot_tiers.c.weight)
+                        .where(loot_tiers.c.guild_id == guild_id)
+                        .order_by(loot_tiers.c.position)
+                    )
+                ).all()
+            self.tiers[guild_id] = [tuple(row) for row in rows] or DEFAULT_TIERS
+        return self.tiers[guild_id]
+
+    async def get(self, guild_id, items):
+        """Return the compiled table for a guild, recompiling only if tiers or roles changed."""
+        tiers = await self.get_tiers(guild_id)
+        signature = (
+            tuple(tiers),
+            tuple((rarity, tuple(items.get(rarity, ()))) for rarity, _ in tiers),
+        )
+        cached = self.compiled.get(guild_id)
+        if cached is None or cached[0] != signature:
+            cached = (signature, LootTable(tiers, items))
+            self.compiled[guild_id] = cached
+        return cached[1]
+
+    async def set_weight(self, guild_id, rarity, weight):
+        """Change (or add) one tier's weight for a guild; new tiers go on top.
+
+        Only rarities that have cosmetic roles can be set, so a typo can't
+        add a tier that never rolls.
+        """
+        if rarity not in ROLE_DEFINITIONS:
+            raise ValueError(f"Unknown rarity {rarity!r}")
+        tiers = await self.get_tiers(guild_id)
+        rows = [
+            {"guild_id": guild_id, "rarity": name, "weight": w, "position": position}
+            for position, (name, w) in enumerate(tiers)
+        ]
+        if rarity not in [name for name, _ in tiers]:
+            rows.append(
+                {
+                    "guild_id": guild_id,
+                    "rarity": rarity,
+                    "weight": weight,
+                    "position": len(tiers),
+                }
+            )
+        for row in rows:
+            if row["rarity"] == rarity:
+                row["weight"] = weight
+
+        # Write the whole table so a guild still on the defaults gets its own copy
+        stmt = insert(loot_tiers).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            weight=stmt.inserted.weight, updated_at=func.now()
+        )
+        async with self.db.session() as session:
+            await session.execute(stmt)
+
+        self.tiers[guild_id] = [(row["rarity"], row["weight"]) for row in rows]
+        return self.tiers[guild_id]
@@ -1,65 +1,132 @@
 import discord
 from discord import app_commands
-from discord.ext import tasks
 
-import random
-from math import floor, log
+from math import ceil, floor, log
 
 import datetime
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from alembic import command
-from alembic.config import Config
-
-from models.submissions import Submission
-from models.user_gold import UserGold
-from models.user_inventory import UserInventory
-from models.casino_spent_earned import CasinoSpentEarned
+from typing import Literal
 
 import os
 from dotenv import load_dotenv
 
+from database import Database
+from animation import AnimationScheduler
 from blackjack import BlackjackGame
+from equip import equip_role
 from higherlower import HigherLower
+from leaderboard import CasinoLeaderboard, UserNameCache
+import ledger
+from loot import LootTables
+from metrics import InstrumentedTree, Metrics, instrument_engine
+from migrations import ensure_schema
+from rng import RngService
+from role_registry import ROLE_DEFINITIONS, RoleRegistry
+from rolls import RollEngine
+from settlement import CasinoSettlement
+from shoe import ShoePool
 from slots import SlotsGame
+from throttle import Limit, RateLimiter, throttled
+from timers import TimerScheduler
+from views import ViewRegistry
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# Log every SQL statement only when asked to, e.g. SQL_ECHO=true while debugging
+SQL_ECHO = os.getenv("SQL_ECHO", "").lower() in ("1", "true", "yes")
+# Number of decks shuffled into each blackjack/high-low shoe
+SHOE_DECKS = int(os.getenv("SHOE_DECKS", "6"))
+# "pcg" for fast seeded streams, "secure" for an HMAC-DRBG
+RNG_BACKEND = os.getenv("RNG_BACKEND", "pcg")
+# Local port for the Prometheus /metrics endpoint; empty turns it off
+METRICS_PORT = os.getenv("METRICS_PORT", "")  # empty leaves /metrics off
 
 
 # Set up the client
 class MyClient(discord.Client):
     def __init__(self):
         super().__init__(intents=discord.Intents.default())
-        self.tree = app_commands.CommandTree(self)
 
-        # Initialize an empty dictionary to store items for each guild
-        self.items = {}
+        # Command latency, error and SQL timing metrics, scraped at /metrics
+        self.metrics = Metrics()
+        self.metrics.collect(self.runtime_metrics)
+        self.tree = InstrumentedTree(self, self.metrics)
+
+        # Display names for leaderboards, cached so repeat views skip REST calls
+        self.user_names = UserNameCache(self)
+
+        # Keeps message-edit animations within Discord's rate limits
+        self.animations = AnimationScheduler()
+
+        # Runs delayed deletes, game view expiry and the daily reminder
+        self.timers = TimerScheduler()
+
+        # Seeded random streams for every game and roll, logged for replays
+        self.rng = RngService(RNG_BACKEND)
+
+        # Pre-shuffled card shoes so starting a card game never waits on a shuffle
+        self.shoes = ShoePool(decks=SHOE_DECKS, rng=self.rng)
+
+        # Caps and expires interactive views so abandoned ones don't pile up
+        self.views = ViewRegistry(self.timers)
+
+        # Per-user and per-guild rate limits for the expensive commands
+        self.limiter = RateLimiter()
 
-        # Initialize the SQLite database
+        # Initialize the MySQL database
         self.init_db()
 
     def init_db(self):
-        # Connect to the MySQL database
-        self.engine = create_engine(DATABASE_URL, echo=True)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        # Async engine with a connection pool; each DB call gets its own session
+        self.db = Database(DATABASE_URL, echo=SQL_ECHO)
+        instrument_engine(self.db.engine, self.metrics)
+        self.leaderboard = CasinoLeaderboard(self.db)
+        self.casino = CasinoSettlement(self.db, self.leaderboard)
+        self.loot = LootTables(self.db)
+        self.roles = RoleRegistry(self.db)
+        self.rolls = RollEngine(self.db, self.loot, self.rng)
+
+    async def setup_hook(self):
+        self.timers.start()
+        self.shoes.start()
+        for remind_time in self.remind_times:
+            self.timers.every_day(("remind", remind_time), remind_time, self.check_time)
+        self.timers.every_day(
+            "compact_ledger",
+            datetime.time(hour=4, tzinfo=self.pst),
+            self.compact_ledger,
+        )
+
+        # Migrations run only when the database is behind the alembic scripts
+        if await ensure_schema(self.db, DATABASE_URL, echo=SQL_ECHO):
+            print("Upgraded the database schema")
+
+        # Give back stakes from games that were cut off by the last shutdown
+        refunded = await self.casino.refund_open_holds()
+        if refunded:
+            print(f"Refunded {refunded} unfinished casino games")
+        self.db.balances.start()
+        if METRICS_PORT:
+            try:
+                await self.metrics.serve(port=int(METRICS_PORT))
+            except OSError as e:  # e.g. the port is taken; the bot runs fine without it
+                print(f"Couldn't serve metrics on port {METRICS_PORT}: {e!r}")
 
-        alembic_cfg = Config("alembic.ini")
-        alembic_conn = self.engine.connect()
-        alembic_cfg.attributes["connection"] = alembic_conn
+        await self.leaderboard.load()
+        await self.roles.load()
 
-        with alembic_conn.begin():
-            command.upgrade(alembic_cfg, "head")
+    async def close(self):
+        await self.metrics.close()
+        self.timers.stop()
+        self.shoes.stop()
+        await super().close()
+        await self.db.close()
 
     pst = datetime.datetime.now().astimezone().tzinfo
     remind_times = [
         datetime.time(hour=22, tzinfo=pst),
     ]
 
-    @tasks.loop(time=remind_times)
     async def check_time(self):
         channel = self.get_channel(1255671491387850823)  # omnom
         if channel:
@@ -67,211 +134,78 @@ class MyClient(discord.Client):
                 "<@342526382816886804> it's time to eat! <:ginaMald:1087267737950244925>"
             )
 
+    async def compact_ledger(self):
+        # Fold old gold ledger entries into snapshots to keep the table small
+        folded = await ledger.compact(self.db)
+        if folded:
+            print(f"Folded {folded} gold ledger entries into snapshots")
+
     async def on_guild_join(self, guild):
-        # Define role names, their rarities, and corresponding colors
-        role_definitions = {
-            "Common": [
-                ("Common Role 1", 0xA9A9A9),  # Dark Gray
-                ("Common Role 2", 0xC0C0C0),  # Silver
-                ("Common Role 3", 0xD3D3D3),  # Light Gray
-            ],
-            "Rare": [
-                ("Rare Role 1", 0x0000FF),  # Blue
-                ("Rare Role 2", 0x1E90FF),  # Dodger Blue
-            ],
-            "Epic": [
-                ("Epic Role 1", 0x800080),  # Purple
-                ("Epic Role 2", 0xDA70D6),  # Orchid
-            ],
-            "Legendary": [
-                ("Legendary Role 1", 0xFFD700),  # Gold
-                ("Legendary Role 2", 0xFFA500),  # Orange
-            ],
+        # Create any missing cosmetic roles and remember their IDs
+        await self.roles.sync_guild(guild)
+
+    async def on_guild_role_delete(self, role):
+        # Recreate a deleted cosmetic role; inventories move to the new one
+        if self.roles.lookup(role.guild.id, role.id):
+            await self.roles.sync_guild(role.guild)
+
+    async def on_guild_role_update(self, before, after):
+        # Keep stored names in step with renames
+        if before.name != after.name and self.roles.lookup(after.guild.id, after.id):
+            await self.roles.sync_guild(after.guild)
+
+    def runtime_metrics(self):
+        views = self.views.stats()
+        return {
+            "bot_views_live": views["live"],
+            "bot_views_bytes": views["bytes"],
+            "bot_views_expired_total": views["expired"],
+            "bot_views_evicted_total": views["evicted"],
+            "bot_timers_pending": len(self.timers),
+            "bot_animation_frames_sent_total": self.animations.frames_sent,
+            "bot_animation_frames_dropped_total": self.animations.frames_dropped,
+            "bot_shoes_ready": len(self.shoes.ready),
+            "bot_gold_credits_queued": self.db.balances.queued,
+            "bot_gold_commits_total": self.db.balances.commits,
+            "bot_user_lanes_active": len(self.db.users),
+            "bot_commands_throttled_total": self.limiter.throttled,
         }
 
-        for rarity, role_data in role_definitions.items():
-            if rarity not in self.items:
-                self.items[rarity] = []
-
-            for role_name, color in role_data:
-                # Check if the role already exists
-                existing_role = discord.utils.get(guild.roles, name=role_name)
-                if existing_role is None:
-                    # Create the role with the specified color if it doesn't exist
-                    new_role = await guild.create_role(
-                        name=role_name, color=discord.Color(color)
-                    )
-                    print(
-                        f"Created role: {new_role.name} with ID {new_role.id} and color {color:#06X}"
-                    )
-                    self.items[rarity].append(
-                        (new_role.name, new_role.id)
-                    )  # Store name and ID
-                else:
-                    print(
-                        f"Role {existing_role.name} already exists with ID {existing_role.id}"
-                    )
-                    self.items[rarity].append((existing_role.name, existing_role.id))
+    async def on_app_command_completion(self, interaction, command):
+        self.tree.record(interaction)
 
     async def on_ready(self):
         await self.tree.sync()  # Sync slash commands
         print(f"Logged in as {self.user}")
-        for guild in self.guilds:
-            # Ensure roles are loaded for each guild the bot is already in
-            await self.on_guild_join(guild)
-
-        # start timer to ping gina
-        self.check_time.start()
-
-    def add_gold(self, user_id, amount=1):
-        # Check if the user already exists in the database
-        user_to_add = self.session.query(UserGold).filter_by(user_id=user_id).first()
-        if user_to_add:
-            user_to_add.gold += amount
-        else:
-            user_to_add = UserGold(user_id=user_id, gold=amount)
-            self.session.add(user_to_add)
-        self.session.commit()
-        return user_to_add.gold
-
-    def get_gold(self, user_id):
-        # Get the user's gold count
-        user_to_check = self.session.query(UserGold).filter_by(user_id=user_id).first()
-        if user_to_check:
-            return user_to_check.gold
-        return 0
-
-    def deduct_gold(self, user_id, amount):
-        # Deduct gold from the user if they have enough
-        user_to_deduct = self.session.query(UserGold).filter_by(user_id=user_id).first()
-        if user_to_deduct and user_to_deduct.gold >= amount:
-            user_to_deduct.gold -= amount
-            self.session.commit()
-            return True
-        return False
-
-    # assumes amount_lost is negative and amount_earned is positive
-    def update_casino_leaderboard(self, user_id, amount_spent=0, amount_earned=0):
-        """Update user for amount spent and amount lost from casino games"""
-        user_to_update = (
-            self.session.query(CasinoSpentEarned).filter_by(user_id=user_id).first()
-        )
-        if user_to_update:
-            # Ensure total_spent and total_earned are initialized to 0 if None
-            user_to_update.total_spent = (
-                user_to_update.total_spent or 0
-            ) + amount_spent
-            user_to_update.total_earned = (
-                user_to_update.total_earned or 0
-            ) + amount_earned
-        else:
-            # Create a new record with initial values
-            user_to_update = CasinoSpentEarned(
-                user_id=user_id, total_spent=amount_spent, total_earned=amount_earned
-            )
-            self.session.add(user_to_update)
-
-        self.session.commit()
-
-    def has_submitted(self, message_id):
-        # Check if the image has already been submitted for gold
-        return (
-            self.session.query(Submission).filter_by(message_id=message_id).first()
-            is not None
-        )
-
-    def track_submission(self, message_id, author_id):
-        # Track the submission with the author's ID
-        new_submission = Submission(message_id=message_id, user_id=author_id)
-        self.session.add(new_submission)
-        self.session.commit()
-
-    def fetch_submissions(self, user_id):
-        # Fetch all submissions by the user
-        return self.session.query(Submission).filter_by(user_id=user_id).all()
-
-    def get_current_streak(self, user_id):
-        submissions = self.fetch_submissions(user_id)
-        if not submissions:
-            return 0
-        # most likely won't be needed bc message id, but with test cases might f something up
-        sorted_submissions = sorted(submissions, key=lambda x: x.inserted_at)
-        unique_days = set()
-        for i in range(len(sorted_submissions) - 1, -1, -1):
-            submission_date = sorted_submissions[i].inserted_at.date()
-            # check if there is at least one submission per day
-            if submission_date not in unique_days:
-                unique_days.add(submission_date)
-                # print(f"found submission for {submission_date}")
-            # check if there is a gap between submissions
-            if (
-                i > 0
-                and (
-                    submission_date - sorted_submissions[i - 1].inserted_at.date()
-                ).days
-                > 1
-            ):
-                # print(f"found gap between {submission_date} and {sorted_submissions[i - 1].inserted_at.date()}")
-                break
-        streak = len(unique_days)
-        return streak
-
-    def roll_item(self):
-        # Roll for an item based on probabilities
-        roll = random.random()
-        if roll < 0.50:
-            role_list = self.items["Common"]
-            if role_list:
-                gained_role = random.choice(role_list)
-        elif roll < 0.80:  # 50% + 30% = 80%
-            role_list = self.items["Rare"]
-            if role_list:
-                gained_role = random.choice(role_list)
-        elif roll < 0.99:  # 80% + 19% = 99%
-            role_list = self.items["Epic"]
-            if role_list:
-                gained_role = random.choice(role_list)
-        else:
-            role_list = self.items["Legendary"]
-            if role_list:
-                gained_role = random.choice(role_list)
-
-        return gained_role
-
-    def add_item_to_inventory(self, user_id, role_id):
-        # Add the item to the user's inventory
-        user_inventory = (
-            self.session.query(UserInventory)
-            .filter_by(user_id=user_id, role_id=role_id)
-            .first()
-        )
-        if user_inventory:
-            user_inventory.quantity += 1
-        else:
-            user_inventory = UserInventory(user_id=user_id, role_id=role_id, quantity=1)
-            self.session.add(user_inventory)
-        self.session.commit()
-
-    def get_inventory(self, user_id):
-        # Get the user's inventory with role IDs instead of names
-        return (
-            self.session.query(UserInventory.role_id, UserInventory.quantity)
-            .filter_by(user_id=user_id)
-            .all()
-        )
+        # Ensure roles are loaded for each guild the bot is already in
+        await self.roles.bootstrap(self.guilds)
 
 
 # Instantiate the client
 client = MyClient()
 
 
+@client.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error):
+    client.tree.record(interaction, error)
+    if isinstance(error, app_commands.CommandOnCooldown):
+        # Throttled before the command ran, so this reply is all it costs
+        await interaction.response.send_message(
+            f"Slow down! Try again in {ceil(error.retry_after)}s.",
+            ephemeral=True,
+            delete_after=5,
+        )
+        return
+    await app_commands.CommandTree.on_error(client.tree, interaction, error)
+
+
 # FOR TESTING - adds 10 gold to user
 @client.tree.command(name="add10", description="Adds 10 gold to user.")
 async def add10(interaction: discord.Interaction):
     await interaction.response.defer()
 
     user_id = interaction.user.id
-    client.add_gold(user_id, 10)
+    await client.db.add_gold(user_id, 10, "admin")
 
     # Create an embed
     embed = discord.Embed(
@@ -311,29 +245,38 @@ async def get_image_link(interaction: discord.Interaction, message: discord.Mess
                 )
                 return
 
-            # Check if the image has already been submitted for gold
-            if client.has_submitted(message_id):
-                await interaction.response.send_message(
-                    "This image has already been submitted for gold. No further submissions allowed.",
-                    ephemeral=True,
-                    delete_after=5,
-                )
-                return
+            # Check and credit in the author's lane so a double click pays once
+            async with client.db.users.lane(author_id):
+                # Check if the image has already been submitted for gold
+                if await client.db.has_submitted(message_id):
+                    await interaction.response.send_message(
+                        "This image has already been submitted for gold. No further submissions allowed.",
+                        ephemeral=True,
+                        delete_after=5,
+                    )
+                    return
+
+                user_id = interaction.user.id  # Get the user's ID
 
-            user_id = interaction.user.id  # Get the user's ID
+                response_text = "You have now received +1 gold!"
 
-            response_text = "You have now received +1 gold!"
+                streak = await client.db.get_streak(user_id)
+                bonus = 0
+                if streak > 7:
+                    bonus = floor(log(streak, 7))
+                    response_text += f" (+{bonus} streak bonus)!"
 
-            streak = client.get_current_streak(user_id)
-            bonus = 0
-            if streak > 7:
-                bonus = floor(log(streak, 7))
-                response_text += f" (+{bonus} streak bonus)!"
+                # Extra reward for the second photo of the day
+                if await client.db.count_submissions_today(user_id) == 1:
+                    bonus += 1
+                    response_text += " (+1 second photo bonus)!"
 
-            current_gold = client.add_gold(
-                user_id, 1 + bonus
-            )  # Add gold and get updated total
-            client.track_submission(message_id, author_id)  # Track the submission
+                current_gold = await client.db.add_gold(
+                    user_id, 1 + bonus
+                )  # Add gold and get updated total
+                await client.db.track_submission(
+                    message_id, author_id
+                )  # Track the submission
 
             # Create an embed for successful submission
             embed = discord.Embed(
@@ -365,7 +308,7 @@ async def get_image_link(interaction: discord.Interaction, message: discord.Mess
 # displays users current streak
 @client.tree.command(name="streaks", description="list current streak")
 async def get_streak(interaction: discord.Interaction):
-    streak = client.get_current_streak(interaction.user.id)
+    streak = await client.db.get_streak(interaction.user.id)
     if streak == 0:
         await interaction.response.send_message(
             "You have not submitted any dailies yet."
@@ -379,65 +322,100 @@ async def get_streak(interaction: discord.Interaction):
 
 # Define the roll command
 @client.tree.command(name="roll", description="Roll for items costing 1 gold each.")
+@throttled(client.limiter, per_user=Limit(0.5, 3), per_guild=Limit(5, 20))
 async def roll(interaction: discord.Interaction, amount: int):
     await interaction.response.defer()
 
     user_id = interaction.user.id  # Get the user's ID
 
-    # Deduct gold for the rolls
-    if not client.deduct_gold(user_id, amount):
+    if amount <= 0:
+        await interaction.followup.send(
+            "You need to roll at least once!", ephemeral=True, delete_after=5
+        )
+        return
+
+    # Roll everything at once; gold and inventory are updated in one transaction
+    rolled_items = await client.rolls.roll(
+        user_id, interaction.guild.id, client.roles.items(interaction.guild.id), amount
+    )
+    if rolled_items is None:
         await interaction.followup.send(
             "You do not have enough gold to roll.", ephemeral=True, delete_after=5
         )
         return
 
-    # Create a loading embed
     embed = discord.Embed(
-        title="Rolling...",
-        description="Please wait while we process your request!",
+        title="Rolling Result",
         color=0xFFD700,  # Gold color
     )
-
-    # Set the loading GIF as the thumbnail
     embed.set_thumbnail(
         url="https://media.tenor.com/a6HSobGpgGMAAAAM/%E3%83%91%E3%82%BA%E3%83%89%E3%83%A9-puzzle-and-dragons.gif"
     )
 
-    # Send the loading embed as a temporary message
-    loading_message = await interaction.followup.send(embed=embed, ephemeral=True)
-
-    # Roll the items
-    rolled_items = []
-    for _ in range(amount):
-        role = client.roll_item()
-        client.add_item_to_inventory(
-            user_id, role[1]
-        )  # Add the role_id to the user's inventory
-        rolled_items.append(role)
-
     # Prepare the response message with role colors
     if rolled_items:
         role_messages = []
-        for roll_name, role_id in rolled_items:
+        for (roll_name, role_id), count in rolled_items.items():
             role = interaction.guild.get_role(
                 role_id
             )  # Get the role object from the guild
             if role:
-                # Format the role name in the color of the role
-                role_messages.append(
-                    f"{role.mention}"
-                )  # Use mention to display in the role color
+                # Use mention to display in the role color
+                role_messages.append(f"{role.mention} (x{count})")
 
         # Set the embed description with rolled items
-        embed.title = "Rolling Result"
         embed.description = f"You rolled and gained: {', '.join(role_messages)}.\nYou spent {amount} gold."
     else:
         embed.description = "You didn't gain any roles."  # should not occur
 
-    # Send the final embed as a response
-    await loading_message.edit(
-        embed=embed
-    )  # Edit the loading message to show the final embed
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+# Define a slash command to show the server's roll odds
+@client.tree.command(name="loot_odds", description="Show the odds for each rarity.")
+async def loot_odds(interaction: discord.Interaction):
+    # The compiled table's odds, so tiers without roles show their real 0%
+    table = await client.loot.get(
+        interaction.guild.id, client.roles.items(interaction.guild.id)
+    )
+
+    embed = discord.Embed(title="Roll Odds", color=0xFFD700)
+    embed.description = "\n".join(
+        f"{rarity}: {chance:.2%}" for rarity, chance in table.odds()
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# Admin command to tune the odds of a rarity
+@client.tree.command(
+    name="set_loot_odds", description="Set the relative weight of a rarity."
+)
+@app_commands.describe(rarity="Rarity name", weight="Relative weight, 0 to disable")
+@app_commands.choices(
+    rarity=[app_commands.Choice(name=name, value=name) for name in ROLE_DEFINITIONS]
+)
+@app_commands.default_permissions(administrator=True)
+async def set_loot_odds(interaction: discord.Interaction, rarity: str, weight: float):
+    if weight < 0:
+        await interaction.response.send_message(
+            "The weight can't be negative!", ephemeral=True, delete_after=5
+        )
+        return
+
+    if rarity not in ROLE_DEFINITIONS:
+        await interaction.response.send_message(
+            f"{rarity} is not a rarity!", ephemeral=True, delete_after=5
+        )
+        return
+
+    await client.loot.set_weight(interaction.guild.id, rarity, weight)
+    table = await client.loot.get(
+        interaction.guild.id, client.roles.items(interaction.guild.id)
+    )
+    chance = dict(table.odds())[rarity]
+    await interaction.response.send_message(
+        f"{rarity} now has a {chance:.2%} chance per roll.", ephemeral=True
+    )
 
 
 # Define a slash command to check user's inventory
@@ -446,7 +424,7 @@ async def roll(interaction: discord.Interaction, amount: int):
 )
 async def inventory(interaction: discord.Interaction):
     user_id = interaction.user.id  # Get the user's ID
-    inventory_items = client.get_inventory(user_id)  # Get the user's inventory
+    inventory_items = await client.db.get_inventory(user_id)  # Get the user's inventory
 
     # Create an embed for the inventory response
     embed = discord.Embed(
@@ -497,32 +475,15 @@ class RoleSelect(discord.ui.Select):
         super().__init__(placeholder="Select a role to equip...", options=options)
 
     async def callback(self, interaction: discord.Interaction):
+        interaction.client.views.touch(self.view)  # using the menu pushes expiry back
         selected_role_id = int(self.values[0])  # Get the selected role ID
         role_to_equip = interaction.guild.get_role(
             selected_role_id
         )  # Get the role object
 
         if role_to_equip:
-            # Get the role's name to determine its rarity
-            role_name = role_to_equip.name
-
-            # Remove previously equipped roles in the same category
-            equipped_roles = []
-            for rarity, roles in interaction.client.items.items():
-                for role in roles:
-                    if role[0] != role_name:  # Don't remove the newly selected role
-                        equipped_role = discord.utils.get(
-                            interaction.user.roles, id=role[1]
-                        )
-                        if equipped_role:
-                            equipped_roles.append(equipped_role)
-
-            # Remove equipped roles
-            if equipped_roles:
-                await interaction.user.remove_roles(*equipped_roles)
-
-            # Assign the new role to the user
-            await interaction.user.add_roles(role_to_equip)
+            # Swap out any other cosmetic role in a single member edit
+            await equip_role(interaction.client.roles, interaction.user, role_to_equip)
             await interaction.response.send_message(
                 f"You have equipped the role: {role_to_equip.mention}!",
                 ephemeral=True,
@@ -534,6 +495,7 @@ class RoleSelect(discord.ui.Select):
             await interaction.message.edit(
                 view=self.view
             )  # Update the message to reflect the change
+            interaction.client.views.release(self.view, delete_after=None)
         else:
             await interaction.response.send_message(
                 "The selected role no longer exists.", ephemeral=True, delete_after=5
@@ -542,16 +504,25 @@ class RoleSelect(discord.ui.Select):
 
 # Define a view to hold the select menu
 class RoleSelectView(discord.ui.View):
-    def __init__(self, roles):
-        super().__init__(timeout=None)  # Set timeout to None for no automatic timeout
+    def __init__(self, roles, player):
+        super().__init__(timeout=None)  # idle expiry is handled by the ViewRegistry
+        self.player = player  # Only the user who ran /equip can use the menu
         self.add_item(RoleSelect(roles))  # Add the select menu to the view
 
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user != self.player:
+            await interaction.response.send_message(
+                "These are not your roles!", ephemeral=True, delete_after=5
+            )
+            return False
+        return True
+
 
 # Define a slash command to equip a role from the user's inventory
 @client.tree.command(name="equip", description="Equip a role from your inventory.")
 async def equip(interaction: discord.Interaction):
     user_id = interaction.user.id  # Get the user's ID
-    inventory_items = client.get_inventory(user_id)  # Get the user's inventory
+    inventory_items = await client.db.get_inventory(user_id)  # Get the user's inventory
 
     if not inventory_items:
         await interaction.response.send_message(
@@ -575,6 +546,7 @@ async def equip(interaction: discord.Interaction):
         await interaction.response.send_message(
             "Please select a role to equip:", view=view, ephemeral=True
         )
+        client.views.track(view, user_id, interaction.delete_original_response)
     else:
         await interaction.response.send_message(
             "You have no valid roles to equip.", ephemeral=True, delete_after=5
@@ -585,22 +557,52 @@ async def equip(interaction: discord.Interaction):
 @client.tree.command(name="check_gold", description="Check your current gold balance.")
 async def check_gold(interaction: discord.Interaction):
     user_id = interaction.user.id  # Get the user's ID
-    gold = client.get_gold(user_id)  # Get the user's gold count
+    gold = await client.db.get_gold(user_id)  # Get the user's gold count
     await interaction.response.send_message(
         f"You currently have {gold} gold.", ephemeral=True, delete_after=30
     )
 
 
+# Admin command to see where a user's gold went
+@client.tree.command(
+    name="gold_history", description="Show a user's recent gold changes."
+)
+@app_commands.describe(user="Whose history to show")
+@app_commands.default_permissions(administrator=True)
+async def gold_history(interaction: discord.Interaction, user: discord.User):
+    entries = await client.db.get_gold_history(user.id)
+    stored, replayed = await client.db.check_gold_ledger(user.id)
+
+    embed = discord.Embed(title=f"Gold History: {user.display_name}", color=0xFFD700)
+    embed.description = (
+        "\n".join(
+            f"{entry.inserted_at:%Y-%m-%d %H:%M} {entry.amount:+} ({entry.reason})"
+            f" → {entry.balance_after}"
+            for entry in entries
+        )
+        or "No gold changes yet."
+    )
+    # The ledger must replay to the stored balance; anything else is drift
+    if stored == replayed:
+        embed.set_footer(text=f"Balance {stored} gold, matches the ledger")
+    else:
+        embed.set_footer(
+            text=f"Balance {stored} gold, but the ledger adds up to {replayed}!"
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 # Define a select menu for combining roles
 class RoleCombineSelect(discord.ui.Select):
-    def __init__(self, roles, session):
+    def __init__(self, roles, db):
         options = [
             discord.SelectOption(label=role.name, value=str(role.id)) for role in roles
         ]
         super().__init__(placeholder="Select a role to combine...", options=options)
-        self.session = session  # Store the session for later use
+        self.db = db  # Store the database for later use
 
     async def callback(self, interaction: discord.Interaction):
+        interaction.client.views.touch(self.view)  # using the menu pushes expiry back
         selected_role_id = int(self.values[0])  # Get the selected role ID
         role_to_combine = interaction.guild.get_role(
             selected_role_id
@@ -609,79 +611,62 @@ class RoleCombineSelect(discord.ui.Select):
         if role_to_combine:
             user_id = interaction.user.id
 
-            # Query the quantity for the user
-            try:
-                user_inventory = (
-                    self.session.query(UserInventory)
-                    .filter_by(user_id=user_id, role_id=role_to_combine.id)
-                    .first()
+            # Determine the new rarity
+            next_role_id = self.get_higher_rarity(role_to_combine.id, interaction)
+
+            # Spending the roles, the audited draw and the reward commit together
+            upgraded = await self.db.combine_roles(
+                user_id,
+                interaction.guild.id,
+                role_to_combine.id,
+                next_role_id,
+                interaction.client.rng.stream(),
+            )
+            if upgraded is None:
+                self.disabled = True
+                await interaction.response.edit_message(
+                    content=f"You no longer have 10 of {role_to_combine.name}.",
+                    view=self.view,
                 )
-            except Exception as e:
-                print(f"Error occurred: {e}")
-
-            if user_inventory:
-                # Deduct 10 from the user's inventory
-                self.session.query(UserInventory).filter_by(
-                    user_id=user_id, role_id=role_to_combine.id
-                ).update({UserInventory.quantity: UserInventory.quantity - 10})
-
-                # Commit the transaction
-                self.session.commit()
+                interaction.client.views.release(self.view)
+                return
 
-            # Determine the new rarity
-            new_rarity = self.get_higher_rarity(role_to_combine.name, interaction)
-            if new_rarity:
-                # 10% chance to gain the higher rarity role
-                if random.random() < 0.1:
-                    new_role = discord.utils.get(
-                        interaction.guild.roles, name=new_rarity[0]
-                    )
-                    if new_role:
-                        client.add_item_to_inventory(
-                            user_id, new_role.id
-                        )  # Add the new role to inventory
-                        follow_up_msg = (
-                            f"You combined and gained a new role: {new_role.mention}!"
-                        )
-                    else:
-                        follow_up_msg = "Failed to gain a higher rarity role."
-                else:
-                    follow_up_msg = "You combined but did not gain a new role."
-            else:
+            if next_role_id is None:
                 follow_up_msg = f"There is no higher rarity for {role_to_combine.name}."
+            elif upgraded:
+                new_role = interaction.guild.get_role(next_role_id)
+                follow_up_msg = (
+                    f"You combined and gained a new role: {new_role.mention}!"
+                    if new_role
+                    else "You combined and gained a higher rarity role!"
+                )
+            else:
+                follow_up_msg = "You combined but did not gain a new role."
 
             # Disable the select menu
             self.disabled = True
             await interaction.response.edit_message(
                 content=follow_up_msg, view=self.view
             )  # Update the message to show the result and disabled select
+            interaction.client.views.release(self.view)
         else:
             await interaction.response.send_message(
                 "The selected role no longer exists.", ephemeral=True, delete_after=5
             )
 
-    def get_higher_rarity(self, role_name, interaction: discord.Interaction):
-        """Return the name and rarity of the higher role if exists."""
-        for rarity, roles in interaction.client.items.items():
-            for role in roles:
-                if role[0] == role_name:
-                    next_rarity = list(interaction.client.items.keys())
-                    next_index = next_rarity.index(rarity) + 1
-                    if next_index < len(next_rarity):
-                        next_rarity_name = next_rarity[next_index]
-                        return interaction.client.items[next_rarity_name][
-                            0
-                        ]  # Return the first role of next rarity
-        return None
+    def get_higher_rarity(self, role_id, interaction: discord.Interaction):
+        """Return the ID of the role this one combines into, if there is one."""
+        info = interaction.client.roles.lookup(interaction.guild.id, role_id)
+        return info.next_role_id if info else None
 
 
 # Define a view to hold the select menu for combining roles
 class RoleCombineSelectView(discord.ui.View):
-    def __init__(self, roles, session):
-        super().__init__(timeout=None)  # Set timeout to None for no automatic timeout
+    def __init__(self, roles, db):
+        super().__init__(timeout=None)  # idle expiry is handled by the ViewRegistry
         self.add_item(
-            RoleCombineSelect(roles, session)
-        )  # Pass the session to the select menu
+            RoleCombineSelect(roles, db)
+        )  # Pass the database to the select menu
 
 
 # Define a slash command to combine a role from the user's inventory
@@ -691,7 +676,7 @@ class RoleCombineSelectView(discord.ui.View):
 )
 async def combine(interaction: discord.Interaction):
     user_id = interaction.user.id  # Get the user's ID
-    inventory_items = client.get_inventory(user_id)  # Get the user's inventory
+    inventory_items = await client.db.get_inventory(user_id)  # Get the user's inventory
 
     if not inventory_items:
         await interaction.response.send_message(
@@ -713,15 +698,11 @@ async def combine(interaction: discord.Interaction):
 
     # If there are valid roles to combine
     if roles:
-        view = RoleCombineSelectView(
-            roles, client.session
-        )  # Pass the session to the view
+        view = RoleCombineSelectView(roles, client.db)  # Pass the database to the view
         await interaction.response.send_message(
-            "Please select a role to combine:",
-            view=view,
-            ephemeral=True,
-            delete_after=60,
+            "Please select a role to combine:", view=view, ephemeral=True
         )
+        client.views.track(view, user_id, interaction.delete_original_response)
     else:
         await interaction.response.send_message(
             "You have no roles with sufficient quantity to combine.",
@@ -733,29 +714,33 @@ async def combine(interaction: discord.Interaction):
 # Define the symbols for the slot machine
 symbols = ["🍒", "🍋", "🍉", "🍇", "🍎"]
 
+
 # Define the /slots command
 @client.tree.command(name="slots", description="Play a slot machine game!")
 @app_commands.describe(bet="Amount to bet")
+@throttled(client.limiter, per_user=Limit(0.2, 2), per_guild=Limit(2, 10))
 async def slots(interaction: discord.Interaction, bet: int):
+    user_id = interaction.user.id  # Get the user's ID
     if bet < 0:
         await interaction.response.send_message(
             "You need to bet a positive amount!", ephemeral=True
         )
         return
-    elif bet > client.get_gold(interaction.user.id):
+
+    # Hold the bet in escrow so the same gold can't be bet twice
+    hold = await client.casino.hold(user_id, "slots", bet)
+    if hold is None:
         await interaction.response.send_message(
             "You don't have enough gold to bet that amount!", ephemeral=True
         )
         return
-    game = SlotsGame()
-    result = await game.start_game(interaction, bet)
-    client.deduct_gold(interaction.user.id, bet)
-    user_id = interaction.user.id  # Get the user's ID
-    client.update_casino_leaderboard(user_id, bet * -1, 0)  # add amount spent to play
 
-    if result > 0:
-        client.update_casino_leaderboard(user_id, 0, result)  # add amount earned
-        client.add_gold(user_id, result)
+    game = SlotsGame(client.animations, client.rng.stream())
+    result = await game.start_game(interaction, bet)
+    if result is None:  # the machine was never spun, so there was no game
+        await client.casino.refund(hold)
+    else:
+        await client.casino.settle(hold, bet, max(result, 0), game.rng)
 
 
 @client.tree.command(
@@ -763,60 +748,51 @@ async def slots(interaction: discord.Interaction, bet: int):
 )  # Double down wont be allowed after a split
 @app_commands.describe(bet="Amount to bet")
 async def blackjack(interaction: discord.Interaction, bet: int):
+    user_id = interaction.user.id
     if bet < 0:
         await interaction.response.send_message(
             "You need to bet a positive amount!", ephemeral=True
         )
         return
-    elif bet > client.get_gold(interaction.user.id):
+
+    # Hold the bet in escrow, plus a second bet for a double down if affordable
+    hold = await client.casino.hold(user_id, "blackjack", bet, optional=bet)
+    if hold is None:
         await interaction.response.send_message(
             "You don't have enough gold to bet that amount!", ephemeral=True
         )
         return
 
-    can_double = True  # if double down or split is allowed
-    if bet * 2 > client.get_gold(interaction.user.id):
-        can_double = False
+    can_double = hold.amount >= bet * 2  # if double down or split is allowed
 
-    game = BlackjackGame(can_double)
+    game = BlackjackGame(can_double, client.shoes.take())
     result, did_double = await game.start_game(
         interaction, bet
     )  # amount of money gained
 
-    user_id = interaction.user.id
-
-    #  deduct money for cost of playing
-    if did_double:
-        client.deduct_gold(user_id, bet * 2)
-    else:
-        client.deduct_gold(user_id, bet)
-
+    stake = bet * 2 if did_double else bet
     if result < 0:  # player lost
-        client.update_casino_leaderboard(user_id, result, 0)
+        payout = 0
     elif result > 0:  # player won
-        client.add_gold(user_id, result)
-        if did_double:
-            client.update_casino_leaderboard(user_id, 2 * bet * -1, result)
-        else:
-            client.update_casino_leaderboard(user_id, bet * -1, result)
+        payout = int(result)
     else:  # result is push, refund the bet
-        if did_double:
-            client.add_gold(user_id, bet * 2)
-            client.update_casino_leaderboard(user_id, bet * -2, bet * 2)
-        else:
-            client.add_gold(user_id, bet)
-            client.update_casino_leaderboard(user_id, bet * -1, bet)
+        payout = stake
+    await client.casino.settle(hold, stake, payout, game.shoe.rng)
 
 
 @client.tree.command(name="high-low", description="Start a game of High-Low")
 @app_commands.describe(bet="Amount to bet")
 async def higherlower(interaction: discord.Interaction, bet: int):
+    user_id = interaction.user.id
     if bet < 0:
         await interaction.response.send_message(
             "You need to bet a positive amount!", ephemeral=True, delete_after=5
         )
         return
-    elif bet > client.get_gold(interaction.user.id):
+
+    # Hold the bet in escrow so the same gold can't be bet twice
+    hold = await client.casino.hold(user_id, "high-low", bet)
+    if hold is None:
         await interaction.response.send_message(
             "You don't have enough gold to bet that amount!",
             ephemeral=True,
@@ -824,30 +800,22 @@ async def higherlower(interaction: discord.Interaction, bet: int):
         )
         return
 
-    user_id = interaction.user.id
-    client.deduct_gold(user_id, bet)
-    client.update_casino_leaderboard(user_id, bet * -1, 0)  # add amount spent to play
-
-    game = HigherLower()
+    game = HigherLower(client.shoes.take())
     result = await game.start_game(interaction, bet)
-
-    if result > 0:
-        client.update_casino_leaderboard(user_id, 0, result)  # add amount earned
-        client.add_gold(user_id, result)
+    await client.casino.settle(hold, bet, int(result), game.shoe.rng)
 
 
 # Define a slash command to check casino leaderboard
 @client.tree.command(
     name="casino_leaderboard", description="Check the casino leaderboard."
 )
+@throttled(client.limiter, per_user=Limit(0.1, 2), per_guild=Limit(0.5, 5))
 async def casino_leaderboard(interaction: discord.Interaction):
-    # Query the database to get the leaderboard data
-    leaderboard_data = (
-        client.session.query(CasinoSpentEarned)
-        .order_by(CasinoSpentEarned.total_earned.desc())
-        .limit(10)
-        .all()
-    )  # Get top 10 users by total_earned
+    # Top 10 users by total_earned, served from memory
+    leaderboard_data = await client.leaderboard.top()
+    names = await client.user_names.resolve(
+        [entry.user_id for entry in leaderboard_data]
+    )  # Look up display names concurrently
 
     # Initialize the embed
     embed = discord.Embed(
@@ -863,9 +831,8 @@ async def casino_leaderboard(interaction: discord.Interaction):
     # Add leaderboard data to the embed
     if leaderboard_data:
         for rank, entry in enumerate(leaderboard_data, start=1):
-            user = await client.fetch_user(entry.user_id)  # Get user object
             embed.add_field(
-                name=f"{rank}. {user.display_name}",
+                name=f"{rank}. {names[entry.user_id]}",
                 value=f"Spent: {entry.total_spent}\nEarned: {entry.total_earned}",
                 inline=False,
             )
@@ -876,6 +843,99 @@ async def casino_leaderboard(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 
+METRIC_TITLES = {
+    "net": "Net Profit",
+    "wagered": "Total Wagered",
+    "biggest_win": "Biggest Win",
+}
+PERIOD_TITLES = {
+    "day": "Last 24 Hours",
+    "week": "Last 7 Days",
+    "month": "Last 30 Days",
+    "all": "All Time",
+}
+
+
+# Define a view to page through a windowed casino leaderboard
+class CasinoTopView(discord.ui.View):
+    page_size = 10
+
+    def __init__(self, player, period, metric):
+        super().__init__(timeout=None)  # idle expiry is handled by the ViewRegistry
+        self.player = player
+        self.period = period
+        self.metric = metric
+        self.cursors = [None]  # keyset cursor for the start of each page seen
+        self.rows = []
+
+    async def build_embed(self):
+        self.rows = await client.db.top_casino_players(
+            self.period, self.metric, after=self.cursors[-1], limit=self.page_size
+        )
+        names = await client.user_names.resolve([user_id for user_id, _ in self.rows])
+
+        embed = discord.Embed(
+            title=f"Casino Top: {METRIC_TITLES[self.metric]}",
+            description=PERIOD_TITLES[self.period],
+            color=discord.Color.gold(),
+        )
+        first_rank = (len(self.cursors) - 1) * self.page_size + 1
+        for rank, (user_id, value) in enumerate(self.rows, start=first_rank):
+            embed.add_field(
+                name=f"{rank}. {names[user_id]}", value=f"{value} gold", inline=False
+            )
+        if not self.rows:
+            embed.description += "\nNo data available yet."
+
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = len(self.rows) < self.page_size
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user != self.player:
+            await interaction.response.send_message(
+                "This is not your leaderboard!", ephemeral=True, delete_after=5
+            )
+            return False
+        client.views.touch(self)  # paging pushes expiry back
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        self.cursors.pop()
+        await interaction.response.edit_message(
+            embed=await self.build_embed(), view=self
+        )
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        last_user_id, last_value = self.rows[-1]
+        self.cursors.append((last_value, last_user_id))
+        await interaction.response.edit_message(
+            embed=await self.build_embed(), view=self
+        )
+
+
+# Define a slash command for time-windowed casino leaderboards
+@client.tree.command(
+    name="casino_top", description="Top casino players over a time window."
+)
+@app_commands.describe(period="Time window", metric="What to rank players by")
+async def casino_top(
+    interaction: discord.Interaction,
+    period: Literal["day", "week", "month", "all"] = "week",
+    metric: Literal["net", "wagered", "biggest_win"] = "net",
+):
+    view = CasinoTopView(interaction.user, period, metric)
+    embed = await view.build_embed()
+    await interaction.response.send_message(embed=embed, view=view)
+    client.views.track(view, interaction.user.id, interaction.delete_original_response)
+
+
 @client.tree.command(name="remind_gina", description="Remind Gina to eat")
 async def remind_gina(interaction: discord.Interaction):
     channel = client.get_channel(1255671491387850823)  # omnom
@@ -0,0 +1,234 @@
+"""In-process metrics, served in the Prometheus text format.
+
+Commands are timed by InstrumentedTree. SQL statements are timed through
+engine events and attributed to the command that ran them via the
+`current_command` context variable; work outside a command is
+"background". `Metrics.serve` exposes everything on a small HTTP endpoint
+at /metrics.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from discord import app_commands
+from sqlalchemy import event
+
+# Seconds; commands that wait on buttons (games) land in the top buckets
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    300,
+)
+
+current_command = ContextVar("current_command", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels, extra=()):
+    pairs = sorted(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters, gauges and histograms keyed by name and labels.
+
+    Collectors are called at scrape time for values that already live
+    elsewhere (view counts, queue lengths); each returns {name: value},
+    read as a counter when the name ends in _total and a gauge otherwise.
+    """
+
+    def __init__(self):
+        self.counters = {}  # (name, labels) -> value
+        self.gauges = {}
+        self.histograms = {}
+        self.collectors = []
+        self.server = None
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(labels.items()))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add(self, name, amount, **labels):
+        key = (name, tuple(labels.items()))
+        self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def collect(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        families = {}  # name -> (type, [lines])
+
+        def family(name, kind):
+            return families.setdefault(name, (kind, []))[1]
+
+        for (name, labels), value in self.counters.items():
+            family(name, "counter").append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), value in self.gauges.items():
+            family(name, "gauge").append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in self.histograms.items():
+            lines = family(name, "histogram")
+            cumulative = 0
+            bounds = [*histogram.buckets, "+Inf"]
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                le = _labels(labels, [("le", bound)])
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for collector in self.collectors:
+            for name, value in collector().items():
+                kind = "counter" if name.endswith("_total") else "gauge"
+                family(name, kind).append(f"{name} {_number(value)}")
+
+        out = []
+        for name, (kind, lines) in sorted(families.items()):
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        """Serve GET /metrics until close() is called."""
+        self.server = await asyncio.start_server(self._handle, host, port)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while True:  # skip the headers
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request.split()
+            if len(parts) > 1 and parts[1] == b"/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            head = (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """A CommandTree that records latency, errors and in-flight counts per command.
+
+    Timing starts in the tree's interaction_check, which runs in the same
+    task as the command, and stops in `record`: called from on_error, and
+    by the client's on_app_command_completion for commands that succeed.
+    """
+
+    def __init__(self, client, metrics):
+        super().__init__(client)
+        self.metrics = metrics
+        self.started = {}  # interaction id -> (command name, start time)
+
+    async def interaction_check(self, interaction):
+        name = interaction.command.qualified_name if interaction.command else "unknown"
+        current_command.set(name)  # SQL run by this command is attributed to it
+        self.started[interaction.id] = (name, time.perf_counter())
+        self.metrics.add("bot_commands_in_flight", 1, command=name)
+        return True
+
+    def record(self, interaction, error=None):
+        started = self.started.pop(interaction.id, None)
+        if started is None:  # failed before it started, e.g. an unknown command
+            name = (
+                interaction.command.qualified_name if interaction.command else "unknown"
+            )
+        else:
+            name, start = started
+            self.metrics.add("bot_commands_in_flight", -1, command=name)
+            self.metrics.observe(
+                "bot_command_duration_seconds",
+                time.perf_counter() - start,
+                command=name,
+            )
+        status = "ok" if error is None else "error"
+        self.metrics.inc("bot_commands_total", command=name, status=status)
+        if error is not None:
+            self.metrics.inc(
+                "bot_command_errors_total", command=name, error=type(error).__name__
+            )
+
+    async def on_error(self, interaction, error):
+        self.record(interaction, error)
+        await super().on_error(interaction, error)
+
+
+def instrument_engine(engine, metrics):
+    """Count and time every SQL statement run by `engine`, per command."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, params, context, executemany):
+        context.metrics_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, params, context, executemany):
+        command = current_command.get() or "background"
+        metrics.inc("bot_db_statements_total", command=command)
+        metrics.observe(
+            "bot_db_statement_seconds",
+            time.perf_counter() - context.metrics_start,
+            command=command,
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        command = current_command.get() or "background"
+        metrics.inc("bot_db_errors_total", command=command)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "alembic", "versions")
+
+REVISION_RE = re.compile(r"^revision\b[^=]*=\s*['\"](\w+)['\"]", re.MULTILINE)
+DOWN_REVISION_RE = re.compile(r"^down_revision\b[^=]*=(.*)$", re.MULTILINE)
+QUOTED_RE = re.compile(r"['\"](\w+)['\"]")
+
+
+def script_heads(versions_dir=VERSIONS_DIR):
+    """Find the head revisions by reading the migration files, without importing Alembic."""
+    revisions = set()
+    parents = set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        revision = REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = DOWN_REVISION_RE.search(source)
+        if down_revision:
+            parents.update(QUOTED_RE.findall(down_revision.group(1)))
+    return revisions - parents
+
+
+async def database_heads(engine):
+    """Return the revisions stamped in the database; empty if it was never migrated."""
+    try:
+        async with engine.connect() as conn:
+            rows = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            return {row[0] for row in rows}
+    except ProgrammingError:  # alembic_version doesn't exist yet
+        return set()
+
+
+def upgrade(database_url, echo=False):
+    """Run `alembic upgrade head` over a short-lived synchronous connection."""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine
+
+    engine = create_engine(database_url, echo=echo)
+    alembic_cfg = Config("alembic.ini")
+    try:
+        with engine.connect() as alembic_conn:
+            alembic_cfg.attributes["connection"] = alembic_conn
+            with alembic_conn.begin():
+                command.upgrade(alembic_cfg, "head")
+    finally:
+        engine.dispose()
+
+
+async def ensure_schema(db, database_url, echo=False):
+    """Upgrade the schema only if the database is behind the migration scripts.
+
+    The common case, an already current database, costs one SELECT. Returns
+    True if an upgrade ran.
+    """
+    if await database_heads(db.engine) == script_heads():
+        return False
+    await asyncio.to_thread(upgrade, database_url, echo)
+    return True
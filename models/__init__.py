@@ -2,6 +2,31 @@ from .submissions import Submission
 from .user_gold import UserGold
 from .user_inventory import UserInventory
 from .casino_spent_earned import CasinoSpentEarned
+from .casino_escrow import CasinoEscrow
+from .casino_result import CasinoResult
+from .casino_rollup import CasinoRollupDaily, CasinoRollupHourly
+from .gold_ledger import GoldLedger
+from .gold_snapshot import GoldSnapshot
+from .guild_role import GuildRole
+from .loot_tier import LootTier
+from .rng_audit import RngAudit
+from .user_streak import UserStreak
 from .base import Base
 
-__all__ = ["Base", "Submission", "UserGold", "UserInventory", "CasinoSpentEarned"]
+__all__ = [
+    "Base",
+    "Submission",
+    "UserGold",
+    "UserInventory",
+    "CasinoSpentEarned",
+    "CasinoEscrow",
+    "CasinoResult",
+    "CasinoRollupHourly",
+    "CasinoRollupDaily",
+    "GoldLedger",
+    "GoldSnapshot",
+    "GuildRole",
+    "LootTier",
+    "RngAudit",
+    "UserStreak",
+]
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, BigInteger, DateTime, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a table to hold casino stakes while a game is in progress
+class CasinoEscrow(Base):
+    __tablename__ = "casino_escrow"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    game = Column(String(20), nullable=False)
+    amount = Column(BigInteger, nullable=False)  # gold taken from the wallet
+    inserted_at = Column(DateTime, nullable=False, default=func.now())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, BigInteger, DateTime, Index, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create an append-only log of every settled casino game
+class CasinoResult(Base):
+    __tablename__ = "casino_results"
+    __table_args__ = (
+        Index("ix_casino_results_user_id_inserted_at", "user_id", "inserted_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    game = Column(String(20), nullable=False)
+    wagered = Column(BigInteger, nullable=False)
+    payout = Column(BigInteger, nullable=False)
+    # The random stream that decided the game; replay it with rng.RngService.replay
+    rng_seed = Column(String(32), nullable=True)
+    rng_draws = Column(BigInteger, nullable=True)
+    rng_backend = Column(String(10), nullable=True)
+    inserted_at = Column(DateTime, nullable=False, default=func.now())
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, Date, DateTime, Integer
+from .base import Base
+
+
+# Per-user casino results summed per hour
+class CasinoRollupHourly(Base):
+    __tablename__ = "casino_rollup_hourly"
+
+    bucket_start = Column(DateTime, primary_key=True)  # start of the hour
+    user_id = Column(BigInteger, primary_key=True)
+    games = Column(Integer, nullable=False)
+    wagered = Column(BigInteger, nullable=False)
+    payout = Column(BigInteger, nullable=False)
+    net = Column(BigInteger, nullable=False)  # payout - wagered
+    biggest_win = Column(BigInteger, nullable=False)  # best single-game net
+
+
+# Per-user casino results summed per day
+class CasinoRollupDaily(Base):
+    __tablename__ = "casino_rollup_daily"
+
+    bucket_day = Column(Date, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    games = Column(Integer, nullable=False)
+    wagered = Column(BigInteger, nullable=False)
+    payout = Column(BigInteger, nullable=False)
+    net = Column(BigInteger, nullable=False)  # payout - wagered
+    biggest_win = Column(BigInteger, nullable=False)  # best single-game net
@@ -8,4 +8,9 @@ class CasinoSpentEarned(Base):
 
     user_id = Column(BigInteger, primary_key=True)
     total_spent = Column(BigInteger, nullable=False)  # total of cost to play
-    total_earned = Column(BigInteger, nullable=False)  # earned + cost to play
+    total_earned = Column(
+        BigInteger, nullable=False, index=True
+    )  # earned + cost to play
+    biggest_win = Column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )  # best single-game net
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, DateTime, Index, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create an append-only log of every change to a user's gold
+class GoldLedger(Base):
+    __tablename__ = "gold_ledger"
+    __table_args__ = (Index("ix_gold_ledger_user_id_id", "user_id", "id"),)
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    amount = Column(BigInteger, nullable=False)  # positive for credits
+    reason = Column(String(20), nullable=False)  # see wallet.REASONS
+    balance_after = Column(BigInteger, nullable=False)
+    inserted_at = Column(DateTime, nullable=False, default=func.now())
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, DateTime
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a table of ledger entries folded away by compaction, one row per user
+class GoldSnapshot(Base):
+    __tablename__ = "gold_snapshots"
+
+    user_id = Column(BigInteger, primary_key=True)
+    balance = Column(BigInteger, nullable=False)  # balance after last_entry_id
+    last_entry_id = Column(BigInteger, nullable=False)
+    entries = Column(BigInteger, nullable=False)  # ledger rows folded in so far
+    updated_at = Column(
+        DateTime, nullable=False, default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, BigInteger, DateTime, SmallInteger, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a table mapping each guild's cosmetic roles to their Discord role IDs
+class GuildRole(Base):
+    __tablename__ = "guild_roles"
+
+    guild_id = Column(BigInteger, primary_key=True)
+    rarity = Column(String(32), primary_key=True)
+    position = Column(SmallInteger, primary_key=True)  # order within the rarity
+    role_id = Column(BigInteger, nullable=False)
+    name = Column(String(100), nullable=False)
+    updated_at = Column(
+        DateTime, nullable=False, default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, DateTime, Float, SmallInteger, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a table for each guild's roll odds
+class LootTier(Base):
+    __tablename__ = "loot_tiers"
+
+    guild_id = Column(BigInteger, primary_key=True)
+    rarity = Column(String(32), primary_key=True)
+    weight = Column(Float, nullable=False)  # relative chance of rolling this tier
+    position = Column(SmallInteger, nullable=False)  # tier order, lowest first
+    updated_at = Column(
+        DateTime, nullable=False, default=func.now(), onupdate=func.now()
+    )
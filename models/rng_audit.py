@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a log of the random stream behind every roll and combine
+class RngAudit(Base):
+    __tablename__ = "rng_audits"
+    __table_args__ = (
+        Index("ix_rng_audits_user_id_inserted_at", "user_id", "inserted_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    guild_id = Column(BigInteger, nullable=False)
+    kind = Column(String(20), nullable=False)  # "roll" or "combine"
+    amount = Column(Integer, nullable=False)  # rolls made or roles combined
+    rng_seed = Column(String(32), nullable=False)  # 128-bit seed in hex
+    rng_draws = Column(BigInteger, nullable=False)
+    rng_backend = Column(String(10), nullable=False)
+    inserted_at = Column(DateTime, nullable=False, default=func.now())
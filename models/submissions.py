@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, DateTime
+from sqlalchemy import Column, BigInteger, DateTime, Index
 from sqlalchemy.sql import func
 from .base import Base
 
@@ -6,6 +6,10 @@ from .base import Base
 # Create a table to track submissions
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # per-user history and per-day lookups are range scans on this index
+        Index("ix_submissions_user_id_inserted_at", "user_id", "inserted_at"),
+    )
 
     user_id = Column(BigInteger, nullable=False)
     message_id = Column(BigInteger, primary_key=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, Date, DateTime, Integer
+from sqlalchemy.sql import func
+from .base import Base
+
+
+# Create a table to keep each user's daily submission streak
+class UserStreak(Base):
+    __tablename__ = "user_streaks"
+
+    user_id = Column(BigInteger, primary_key=True)
+    current_streak = Column(Integer, nullable=False)  # days in a row up to last day
+    best_streak = Column(Integer, nullable=False)
+    last_submission_day = Column(Date, nullable=False)
+    updated_at = Column(
+        DateTime, nullable=False, default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,185 @@
+"""Seeded random streams for every game and roll, so any outcome can be replayed.
+
+Each game or roll gets its own RandomStream from the RngService. A stream
+is a 128-bit seed plus a generator, and it counts every value drawn from it.
+The seed, draw count and backend are stored with the result. Replaying the
+same calls against `RngService.replay(seed, backend)` reproduces the
+outcome exactly, and the draw count must match.
+
+Backends:
+- "pcg": NumPy's PCG64, fast for bulk draws.
+- "secure": HMAC-DRBG over SHA-256 (NIST SP 800-90A), slower but
+  unpredictable without the seed.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+import numpy as np
+from sqlalchemy import insert
+
+from models.rng_audit import RngAudit
+
+rng_audits = RngAudit.__table__
+
+BACKENDS = ("pcg", "secure")
+
+
+class HmacDrbg:
+    """HMAC-DRBG with SHA-256, without reseeding or additional input."""
+
+    def __init__(self, seed):
+        self.key = b"\x00" * 32
+        self.value = b"\x01" * 32
+        self._update(seed)
+
+    def _hmac(self, data):
+        return hmac.new(self.key, data, hashlib.sha256).digest()
+
+    def _update(self, data=b""):
+        self.key = self._hmac(self.value + b"\x00" + data)
+        self.value = self._hmac(self.value)
+        if data:
+            self.key = self._hmac(self.value + b"\x01" + data)
+            self.value = self._hmac(self.value)
+
+    def generate(self, length):
+        out = bytearray()
+        while len(out) < length:
+            self.value = self._hmac(self.value)
+            out += self.value
+        self._update()
+        return bytes(out[:length])
+
+
+def _count(size):
+    return 1 if size is None else int(np.prod(size))
+
+
+class SecureGenerator:
+    """The part of numpy.random.Generator the bot uses, drawn from an HMAC-DRBG."""
+
+    def __init__(self, seed):
+        self.drbg = HmacDrbg(seed.to_bytes(16, "big"))
+
+    def _uint64(self, count):
+        return np.frombuffer(self.drbg.generate(8 * count), dtype=np.uint64)
+
+    def random(self, size=None):
+        values = (self._uint64(_count(size)) >> np.uint64(11)) * (1.0 / 2**53)
+        return float(values[0]) if size is None else values.reshape(size)
+
+    def integers(self, low, high=None, size=None):
+        if high is None:
+            low, high = 0, low
+        span = high - low
+        count = _count(size)
+        # rejection sampling keeps every value exactly equally likely
+        limit = (2**64 // span) * span
+        out = np.empty(0, dtype=np.uint64)
+        while len(out) < count:
+            raw = self._uint64(count - len(out))
+            if limit < 2**64:
+                raw = raw[raw < np.uint64(limit)]
+            out = np.concatenate([out, raw])
+        values = (out % np.uint64(span)).astype(np.int64) + low
+        return int(values[0]) if size is None else values.reshape(size)
+
+    def multinomial(self, n, pvals):
+        cdf = np.cumsum(pvals)
+        picks = np.searchsorted(cdf / cdf[-1], self.random(n), side="right")
+        return np.bincount(np.minimum(picks, len(cdf) - 1), minlength=len(cdf))
+
+    def shuffle(self, x):
+        """Fisher-Yates shuffle in place."""
+        for i in range(len(x) - 1, 0, -1):
+            j = self.integers(i + 1)
+            x[i], x[j] = x[j], x[i]
+
+
+class RandomStream:
+    """One seeded stream of random values, counting what is drawn from it."""
+
+    def __init__(self, seed, backend="pcg"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown RNG backend {backend!r}")
+        self.seed = seed
+        self.backend = backend
+        self.draws = 0
+        if backend == "secure":
+            self.generator = SecureGenerator(seed)
+        else:
+            self.generator = np.random.Generator(np.random.PCG64(seed))
+
+    @property
+    def seed_hex(self):
+        return f"{self.seed:032x}"
+
+    def random(self, size=None):
+        self.draws += _count(size)
+        return self.generator.random(size)
+
+    def integers(self, low, high=None, size=None):
+        self.draws += _count(size)
+        return self.generator.integers(low, high, size=size)
+
+    def multinomial(self, n, pvals):
+        self.draws += 1
+        return self.generator.multinomial(n, pvals)
+
+    def shuffle(self, x):
+        self.draws += len(x)
+        self.generator.shuffle(x)
+
+
+class RngService:
+    """Hands out a fresh RandomStream per game or roll.
+
+    Seeds come from the OS CSPRNG, or from `seed` when given, which makes
+    every stream of a run reproducible (useful for the simulator and
+    debugging).
+    """
+
+    def __init__(self, backend="pcg", seed=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown RNG backend {backend!r}")
+        self.backend = backend
+        self.seeds = np.random.SeedSequence(seed) if seed is not None else None
+        self.streams = 0
+
+    def stream(self):
+        self.streams += 1
+        if self.seeds is None:
+            seed = secrets.randbits(128)
+        else:
+            (child,) = self.seeds.spawn(1)
+            seed = int.from_bytes(child.generate_state(4, np.uint32).tobytes(), "big")
+        return RandomStream(seed, self.backend)
+
+    @staticmethod
+    def replay(seed_hex, backend):
+        """Rebuild a stream from a stored seed to replay its outcome."""
+        return RandomStream(int(seed_hex, 16), backend)
+
+
+def audit_values(stream):
+    """Column values recording which stream produced a result."""
+    return {
+        "rng_seed": stream.seed_hex,
+        "rng_draws": stream.draws,
+        "rng_backend": stream.backend,
+    }
+
+
+async def record_audit(conn, user_id, guild_id, kind, amount, stream):
+    """Log the stream behind a roll or combine so its outcome can be replayed."""
+    await conn.execute(
+        insert(rng_audits).values(
+            user_id=user_id,
+            guild_id=guild_id,
+            kind=kind,
+            amount=amount,
+            **audit_values(stream),
+        )
+    )
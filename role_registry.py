@@ -0,0 +1,173 @@
+import asyncio
+from dataclasses import dataclass
+
+import discord
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+
+from models.guild_role import GuildRole
+import inventory
+
+guild_roles = GuildRole.__table__
+
+# Define role names, their rarities, and corresponding colors, lowest rarity first
+ROLE_DEFINITIONS = {
+    "Common": [
+        ("Common Role 1", 0xA9A9A9),  # Dark Gray
+        ("Common Role 2", 0xC0C0C0),  # Silver
+        ("Common Role 3", 0xD3D3D3),  # Light Gray
+    ],
+    "Rare": [
+        ("Rare Role 1", 0x0000FF),  # Blue
+        ("Rare Role 2", 0x1E90FF),  # Dodger Blue
+    ],
+    "Epic": [
+        ("Epic Role 1", 0x800080),  # Purple
+        ("Epic Role 2", 0xDA70D6),  # Orchid
+    ],
+    "Legendary": [
+        ("Legendary Role 1", 0xFFD700),  # Gold
+        ("Legendary Role 2", 0xFFA500),  # Orange
+    ],
+}
+
+
+def _empty_items():
+    return {rarity: [] for rarity in ROLE_DEFINITIONS}
+
+
+@dataclass
+class RoleInfo:
+    """Where one cosmetic role sits in its guild's rarity ladder."""
+
+    role_id: int
+    name: str
+    rarity: str
+    tier: int  # index of the rarity, lowest first
+    next_role_id: int | None  # what combining this role can upgrade to
+
+
+def build_index(items):
+    """Map role_id -> RoleInfo for one guild's {rarity: [(role_name, role_id)]}."""
+    rarities = list(items)
+    index = {}
+    for tier, rarity in enumerate(rarities):
+        # combining upgrades to the first role of the next rarity that has any
+        next_role_id = next(
+            (items[higher][0][1] for higher in rarities[tier + 1 :] if items[higher]),
+            None,
+        )
+        for role_name, role_id in items[rarity]:
+            index[role_id] = RoleInfo(role_id, role_name, rarity, tier, next_role_id)
+    return index
+
+
+class RoleRegistry:
+    """Each guild's cosmetic roles as {rarity: [(role_name, role_id)]}, persisted by guild.
+
+    Role IDs are stored so a restart only has to check that each role still
+    exists with `guild.get_role`, instead of searching the guild's roles by
+    name. Roles are only created when missing. Each guild also gets an index
+    by role ID, rebuilt whenever its roles change, so equip and combine look
+    roles up in O(1).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.guilds = {}  # guild_id -> {rarity: [(role_name, role_id)]}
+        self.indexes = {}  # guild_id -> {role_id: RoleInfo}
+
+    def _set_items(self, guild_id, items):
+        self.guilds[guild_id] = items
+        self.indexes[guild_id] = build_index(items)
+
+    async def load(self):
+        """Read every guild's stored roles in one query."""
+        async with self.db.session() as session:
+            rows = await session.execute(
+                select(guild_roles).order_by(
+                    guild_roles.c.guild_id, guild_roles.c.position
+                )
+            )
+            guilds = {}
+            for row in rows:
+                items = guilds.setdefault(row.guild_id, _empty_items())
+                if row.rarity in items:
+                    items[row.rarity].append((row.name, row.role_id))
+        self.guilds = {}
+        self.indexes = {}
+        for guild_id, items in guilds.items():
+            self._set_items(guild_id, items)
+
+    def items(self, guild_id):
+        """Return a guild's roles by rarity, or an empty dict if it isn't set up yet."""
+        return self.guilds.get(guild_id, {})
+
+    def lookup(self, guild_id, role_id):
+        """Return the RoleInfo for a cosmetic role, or None for any other role."""
+        return self.indexes.get(guild_id, {}).get(role_id)
+
+    async def sync_guild(self, guild):
+        """Make sure every defined role exists in the guild and store their IDs.
+
+        A stored role that was deleted is replaced, and everyone's stock of
+        it moves to the replacement in the same transaction.
+        """
+        stored = self.guilds.get(guild.id, {})
+        by_name = None  # built only if a stored role has gone missing
+        items = _empty_items()
+        rows = []
+        replaced = {}  # old role ID -> the role now in its place
+        for rarity, role_data in ROLE_DEFINITIONS.items():
+            known = stored.get(rarity, [])
+            for position, (role_name, color) in enumerate(role_data):
+                role = None
+                if position < len(known):
+                    role = guild.get_role(known[position][1])
+                if role is None:
+                    if by_name is None:
+                        by_name = {existing.name: existing for existing in guild.roles}
+                    role = by_name.get(role_name)
+                if role is None:
+                    # Create the role with the specified color if it doesn't exist
+                    role = await guild.create_role(
+                        name=role_name, color=discord.Color(color)
+                    )
+                    print(
+                        f"Created role: {role.name} with ID {role.id} and color {color:#06X}"
+                    )
+                if position < len(known) and known[position][1] != role.id:
+                    replaced[known[position][1]] = role.id
+                items[rarity].append((role.name, role.id))
+                rows.append(
+                    {
+                        "guild_id": guild.id,
+                        "rarity": rarity,
+                        "position": position,
+                        "role_id": role.id,
+                        "name": role.name,
+                    }
+                )
+
+        if items != stored:
+            stmt = insert(guild_roles).values(rows)
+            stmt = stmt.on_duplicate_key_update(
+                role_id=stmt.inserted.role_id,
+                name=stmt.inserted.name,
+                updated_at=func.now(),
+            )
+            async with self.db.session() as session:
+                await session.execute(stmt)
+                for old_role_id, new_role_id in replaced.items():
+                    await inventory.move_role(session, old_role_id, new_role_id)
+        self._set_items(guild.id, items)
+        return items
+
+    async def bootstrap(self, guilds):
+        """Sync every guild concurrently; one failing guild doesn't hold up the rest."""
+        results = await asyncio.gather(
+            *(self.sync_guild(guild) for guild in guilds), return_exceptions=True
+        )
+        for guild, result in zip(guilds, results):
+            if isinstance(result, Exception):
+                print(f"Failed to set up roles for guild {guild.id}: {result!r}")
@@ -0,0 +1,34 @@
+import inventory
+from rng import record_audit
+
+
+class RollEngine:
+    """Rolls any number of items with one draw and one database transaction."""
+
+    def __init__(self, db, loot, rng):
+        self.db = db
+        self.loot = loot
+        self.rng = rng  # RngService; each roll gets its own stream
+
+    async def roll(self, user_id, guild_id, items, amount):
+        """Charge 1 gold per roll and store the winnings in the same transaction.
+
+        Returns {(role_name, role_id): count}, or None if the user can't
+        afford the rolls.
+        """
+        table = await self.loot.get(guild_id, items)
+        stream = self.rng.stream()
+        rolled = table.roll_many(stream, amount)
+        if not rolled:
+            return rolled  # no roles to roll for, so don't charge
+        async with self.db.balances.transaction(user_id) as write:
+            session = write.session
+            if await write.debit(amount, "roll") is None:
+                return None
+            await record_audit(session, user_id, guild_id, "roll", amount, stream)
+            await inventory.add_items(
+                session,
+                user_id,
+                {role_id: count for (_, role_id), count in rolled.items()},
+            )
+        return rolled
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert, select
+
+from database import upsert_casino_totals
+from models.casino_escrow import CasinoEscrow
+import casino_stats
+import wallet
+
+casino_escrow = CasinoEscrow.__table__
+
+
+@dataclass
+class Hold:
+    """A stake taken from a player's wallet for the length of one game."""
+
+    id: int
+    user_id: int
+    game: str
+    amount: int
+
+
+class CasinoSettlement:
+    """Escrows casino stakes when a game starts and settles them in one transaction.
+
+    A game costs two writes: `hold` moves the stake out of the wallet into
+    escrow, and `settle` pays out, refunds any unused part of the hold, records
+    the casino totals, result log and rollups and releases the escrow row
+    together.
+    """
+
+    def __init__(self, db, leaderboard=None):
+        self.db = db
+        self.leaderboard = leaderboard
+
+    async def hold(self, user_id, game, amount, optional=0):
+        """Escrow `amount` gold, plus `optional` more if the wallet covers it.
+
+        The optional part lets blackjack reserve a double down up front.
+        Returns None if the user can't afford `amount`.
+        """
+        async with self.db.balances.transaction(user_id) as write:
+            held = amount + optional
+            balance = await write.debit(held, game)
+            if balance is None and optional:
+                held = amount
+                balance = await write.debit(held, game)
+            if balance is None:
+                return None
+
+            result = await write.session.execute(
+                insert(casino_escrow).values(user_id=user_id, game=game, amount=held)
+            )
+        return Hold(result.lastrowid, user_id, game, held)
+
+    async def settle(self, hold, wagered, payout, stream=None):
+        """Close a hold: `wagered` is what the game consumed, `payout` what it paid back.
+
+        `stream` is the game's RandomStream, logged with the result.
+
+        Returns the player's new balance, or None if nothing was credited.
+        """
+        wagered = min(wagered, hold.amount)
+        credit = payout + hold.amount - wagered
+        balance = None
+        async with self.db.balances.transaction(hold.user_id) as write:
+            session = write.session
+            if credit > 0:
+                balance = await write.credit(credit, hold.game)
+            totals = await session.execute(
+                upsert_casino_totals(
+                    hold.user_id, wagered * -1, payout, biggest_win=payout - wagered
+                )
+            )
+            await casino_stats.record_result(
+                session, hold.user_id, hold.game, wagered, payout, stream
+            )
+            await session.execute(
+                delete(casino_escrow).where(casino_escrow.c.id == hold.id)
+            )
+        if self.leaderboard is not None:
+            self.leaderboard.record(
+                hold.user_id, wagered * -1, payout, totals.lastrowid
+            )
+        return balance
+
+    async def refund(self, hold):
+        """Give a hold back untouched, for a game that never started.
+
+        Nothing is recorded in the casino totals, result log or rollups.
+        Returns the player's new balance, or None for a zero bet.
+        """
+        balance = None
+        async with self.db.balances.transaction(hold.user_id) as write:
+            if hold.amount > 0:
+                balance = await write.credit(hold.amount, hold.game)
+            await write.session.execute(
+                delete(casino_escrow).where(casino_escrow.c.id == hold.id)
+            )
+        return balance
+
+    async def refund_open_holds(self):
+        """Refund every hold left behind by games that never finished (e.g. a restart)."""
+        async with self.db.session() as session:
+            rows = (await session.execute(select(casino_escrow))).all()
+            for row in rows:
+                await wallet.credit(session, row.user_id, row.amount, row.game)
+            if rows:
+                await session.execute(
+                    delete(casino_escrow).where(
+                        casino_escrow.c.id.in_([row.id for row in rows])
+                    )
+                )
+        for row in rows:
+            self.db.balances.forget(row.user_id)
+        return len(rows)
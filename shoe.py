@@ -0,0 +1,77 @@
+import asyncio
+from collections import deque
+
+from cards import new_deck
+from rng import RngService
+
+
+class Shoe:
+    """`decks` decks shuffled together, with a cut card at `penetration`.
+
+    Dealing past the cut card reshuffles the shoe, so a game can deal for
+    as long as it likes without running out of cards. Every shuffle comes
+    from `rng`, the game's RandomStream.
+    """
+
+    def __init__(self, decks=6, penetration=0.75, rng=None):
+        self.rng = rng if rng is not None else RngService().stream()
+        self.cards = new_deck() * decks
+        self.cut = max(int(len(self.cards) * penetration), 1)
+        self.shuffle()
+
+    def shuffle(self):
+        self.rng.shuffle(self.cards)
+        self.position = 0
+
+    def deal(self):
+        """Deal the next card."""
+        if self.position >= self.cut:
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+
+class ShoePool:
+    """Shuffled shoes ready to hand out, refilled by a background task.
+
+    Taking a shoe costs a deque pop; the shuffle happens later, off the
+    command path. If the pool is ever empty, a shoe is built on the spot.
+    """
+
+    def __init__(self, decks=6, penetration=0.75, size=16, rng=None):
+        self.rng = rng if rng is not None else RngService()
+        self.decks = decks
+        self.penetration = penetration
+        self.size = size
+        self.ready = deque()
+        self.wanted = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.wanted.set()  # fill the pool straight away
+            self.task = asyncio.create_task(self.refill())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def _new_shoe(self):
+        return Shoe(self.decks, self.penetration, self.rng.stream())
+
+    def take(self):
+        """Return a shuffled shoe for one game."""
+        self.wanted.set()
+        if self.ready:
+            return self.ready.popleft()
+        return self._new_shoe()
+
+    async def refill(self):
+        while True:
+            await self.wanted.wait()
+            self.wanted.clear()
+            while len(self.ready) < self.size:
+                self.ready.append(self._new_shoe())
+                await asyncio.sleep(0)  # let commands run between shuffles
@@ -0,0 +1,219 @@
+"""Monte Carlo simulator for the casino games.
+
+Plays whole batches of rounds at once with NumPy, using the rules and
+payouts from the live game modules, and reports return to player (RTP),
+variance and bankroll curves. Every payout is returned per unit bet, stake
+included, so an RTP of 0.95 means the house keeps 5% of what is wagered.
+
+    python simulate.py --rounds 1000000
+    python simulate.py --benchmark
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from blackjack import BLACKJACK_PAYOUT, DEALER_STANDS_ON, WIN_PAYOUT
+from cards import BLACKJACK_VALUE, DECK_SIZE, HIGHLOW_RANK
+from higherlower import POT_GROWTH
+from slots import PAIR, SYMBOLS, THREE_OF_A_KIND
+
+BATCH_SIZE = 200_000  # rounds per batch; keeps card games to ~10 MB of decks
+
+
+# Card -> value tables from cards.py, the same ones the live games score with
+BLACKJACK_VALUES = np.frombuffer(BLACKJACK_VALUE, dtype=np.uint8).astype(np.int16)
+HIGHLOW_RANKS = np.frombuffer(HIGHLOW_RANK, dtype=np.uint8).astype(np.int16)
+DECK = np.arange(DECK_SIZE, dtype=np.uint8)
+
+
+def _shuffled(rng, rounds, decks):
+    """One freshly shuffled shoe of `decks` decks per round, like ShoePool hands out."""
+    return rng.permuted(np.tile(DECK, (rounds, decks)), axis=1)
+
+
+def _batches(rounds, decks=1):
+    while rounds > 0:
+        size = min(rounds, max(BATCH_SIZE // decks, 1))
+        yield size
+        rounds -= size
+
+
+def simulate_slots(rng, rounds):
+    """Return the payout of `rounds` slot spins."""
+    payouts = []
+    for size in _batches(rounds):
+        reels = rng.integers(0, len(SYMBOLS), size=(size, 3))
+        three = (reels[:, 0] == reels[:, 1]) & (reels[:, 1] == reels[:, 2])
+        pair = (reels[:, 0] == reels[:, 1]) | (reels[:, 1] == reels[:, 2])
+        payouts.append(np.where(three, THREE_OF_A_KIND, np.where(pair, PAIR, 0)))
+    return np.concatenate(payouts).astype(np.float64)
+
+
+def _score(total, aces):
+    """Blackjack score with aces dropped from 11 to 1 while the hand is bust."""
+    soft = np.minimum(aces, np.maximum(total - 21 + 9, 0) // 10)
+    return total - 10 * soft
+
+
+def simulate_blackjack(rng, rounds, stand_on=17, decks=6):
+    """Return the payout of `rounds` blackjack hands, each dealt from a new shoe.
+
+    The player hits below `stand_on` and never doubles. As in the live game,
+    reaching 21 or more by hitting ends the hand without the dealer drawing,
+    and results are decided in BlackjackGame.check_winner's order.
+    """
+    payouts = []
+    for size in _batches(rounds, decks):
+        cards = BLACKJACK_VALUES[_shuffled(rng, size, decks)]
+        index = np.arange(size)
+        aces = cards == 11
+
+        player_total = cards[:, 0] + cards[:, 1]
+        player_aces = aces[:, 0].astype(np.int16) + aces[:, 1]
+        player_cards = np.full(size, 2)
+        dealer_total = cards[:, 2] + cards[:, 3]
+        dealer_aces = aces[:, 2].astype(np.int16) + aces[:, 3]
+        dealer_cards = np.full(size, 2)
+        position = np.full(size, 4)
+
+        deciding = np.ones(size, dtype=bool)
+        dealer_draws = np.ones(size, dtype=bool)
+        while True:
+            hit = deciding & (_score(player_total, player_aces) < stand_on)
+            if not hit.any():
+                break
+            card = cards[index, position]
+            player_total += np.where(hit, card, 0)
+            player_aces += hit & (card == 11)
+            player_cards += hit
+            position += hit
+            ended = hit & (_score(player_total, player_aces) >= 21)
+            dealer_draws &= ~ended
+            deciding = hit & ~ended
+
+        while True:
+            hit = dealer_draws & (_score(dealer_total, dealer_aces) < DEALER_STANDS_ON)
+            if not hit.any():
+                break
+            card = cards[index, position]
+            dealer_total += np.where(hit, card, 0)
+            dealer_aces += hit & (card == 11)
+            dealer_cards += hit
+            position += hit
+
+        player = _score(player_total, player_aces)
+        dealer = _score(dealer_total, dealer_aces)
+        payouts.append(
+            np.select(
+                [
+                    (player == 21) & (player_cards == 2),
+                    player > 21,
+                    dealer > 21,
+                    (dealer == 21) & (dealer_cards == 2),
+                    player > dealer,
+                    dealer > player,
+                ],
+                [BLACKJACK_PAYOUT, 0, WIN_PAYOUT, 0, WIN_PAYOUT, 0],
+                default=1,  # push, the bet is refunded
+            )
+        )
+    return np.concatenate(payouts).astype(np.float64)
+
+
+def simulate_highlow(rng, rounds, cash_out_at=3, bet=100, decks=6):
+    """Return the payout of `rounds` high-low games, each dealt from a new shoe.
+
+    The player guesses higher on a dealer card below 8 and lower otherwise,
+    plays on after ties and cashes out after `cash_out_at` wins. Payouts
+    are truncated to whole gold like the live game, so they depend on `bet`.
+    """
+    payouts = []
+    for size in _batches(rounds, decks):
+        cards = HIGHLOW_RANKS[_shuffled(rng, size, decks)]
+        pot = np.full(size, float(bet))
+        streak = np.zeros(size, dtype=np.int64)
+        playing = np.ones(size, dtype=bool)
+        for turn in range(cards.shape[1] - 1):
+            dealer = cards[:, turn]
+            player = cards[:, turn + 1]
+            higher = dealer < 8
+            won = playing & np.where(higher, player > dealer, player < dealer)
+            lost = playing & (player != dealer) & ~won
+            pot = np.where(won, pot * POT_GROWTH, np.where(lost, 0, pot))
+            streak += won
+            playing &= ~lost & (streak < cash_out_at)
+            if not playing.any():
+                break
+        # a game still running when the simulated shoe runs out cashes out
+        payouts.append(np.floor(pot) / bet)
+    return np.concatenate(payouts)
+
+
+GAMES = {
+    "slots": simulate_slots,
+    "blackjack": simulate_blackjack,
+    "high-low": simulate_highlow,
+}
+
+
+def summarize(payouts):
+    """RTP, per-round variance of the net result, and the standard error of the RTP."""
+    net = payouts - 1
+    return {
+        "rtp": float(payouts.mean()),
+        "variance": float(net.var()),
+        "stderr": float(net.std() / np.sqrt(len(net))),
+    }
+
+
+def bankroll_curves(payouts, players, rounds_each, bet=1):
+    """Running bankroll (in gold) of `players` who each play `rounds_each` rounds."""
+    net = (payouts[: players * rounds_each] - 1) * bet
+    return np.cumsum(net.reshape(players, rounds_each), axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--decks", type=int, default=6, help="decks per card shoe")
+    parser.add_argument(
+        "--benchmark", action="store_true", help="report rounds per second"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for name, simulate in GAMES.items():
+        start = time.perf_counter()
+        if simulate is simulate_slots:
+            payouts = simulate(rng, args.rounds)
+        else:
+            payouts = simulate(rng, args.rounds, decks=args.decks)
+        elapsed = time.perf_counter() - start
+        stats = summarize(payouts)
+        print(
+            f"{name:<10} RTP {stats['rtp']:.4f} ± {stats['stderr']:.4f}"
+            f"  variance {stats['variance']:.3f}"
+        )
+        if args.benchmark:
+            print(f"{'':<10} {args.rounds / elapsed:,.0f} rounds/s")
+            continue
+
+        rounds_each = args.rounds // args.players
+        if rounds_each:
+            curves = bankroll_curves(payouts, args.players, rounds_each, bet=100)
+            for checkpoint in sorted({rounds_each // 10, rounds_each} - {0}):
+                low, median, high = np.percentile(
+                    curves[:, checkpoint - 1], [5, 50, 95]
+                )
+                print(
+                    f"{'':<10} 100 gold bets, after {checkpoint} rounds:"
+                    f" 5% {low:+.0f}  median {median:+.0f}  95% {high:+.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,33 @@
 import discord
 
 from game import GameView
-import random
-from asyncio import Event, sleep
+from asyncio import Event
+
+# Shared with simulate.py so the simulator plays the live rules
+SYMBOLS = ["🍒", "🍋", "🍉", "🍇", "🍎"]
+THREE_OF_A_KIND = 3  # payout as a multiple of the bet
+PAIR = 2  # two matching neighbours
+LOSS = -1
+OUTCOMES = {THREE_OF_A_KIND: "three_of_a_kind", PAIR: "pair", LOSS: "loss"}
 
 
 class SlotsGame:
-    def __init__(self):
-        self.symbols = ["🍒", "🍋", "🍉", "🍇", "🍎"]
+    def __init__(self, animations, rng):
+        self.animations = animations  # AnimationScheduler shared by every game
+        self.rng = rng  # this game's RandomStream
+        self.symbols = SYMBOLS
 
     def generate_spins(self, spin_count=1):
         # return a list of a set of 3 random symbols for the amount of spins
-        spins = []
-        for _ in range(spin_count):
-            spin = [random.randint(0, len(self.symbols) - 1) for _ in range(3)]
-            spins.append(spin)
-        return spins
+        return self.rng.integers(len(self.symbols), size=(spin_count, 3)).tolist()
 
     def check_win(self, slots):
         if slots[0] == slots[1] == slots[2]:
-            return 3
+            return THREE_OF_A_KIND
         elif slots[0] == slots[1] or slots[1] == slots[2]:
-            return 2
+            return PAIR
         else:
-            return -1
+            return LOSS
 
     async def start_game(self, interaction: discord.Interaction, bet: int):
         view = SlotsView(self, interaction.user, bet)
@@ -35,8 +39,11 @@ class SlotsGame:
         embed.add_field(name="Slot Spin", value="🟦 🟦 🟦", inline=False)
         embed.add_field(name="Result", value="❓ Good Luck! ❓", inline=True)
         await interaction.response.send_message(embed=embed, view=view)
+        view.track(interaction.client.views, interaction.delete_original_response)
 
         result = await view.wait_for_result()
+        if result is None:
+            return None  # never spun; the bet is refunded
         return result * bet
 
 
@@ -46,13 +53,18 @@ class SlotsView(GameView):
         self.event = Event()
         self.result = 0
         self.bet = bet
+        self.spinning = False
 
     async def wait_for_result(self):
         await self.event.wait()
         return self.result
 
+    async def on_timeout(self):
+        if not self.spinning:  # a spin in progress finishes on its own
+            self.result = None
+            self.event.set()
+
     async def update_game_state(self, interaction: discord.Interaction):
-        print("Updating game state")
         embed = discord.Embed(
             title="🎰  Slots  🎰",
             description=f"🪙 Bet: {self.bet} gold 🪙",
@@ -61,54 +73,55 @@ class SlotsView(GameView):
         embed.add_field(name="Slot Spin", value="🟦 🟦 🟦", inline=False)
         embed.add_field(name="Result", value="❓ Good Luck! ❓", inline=True)
         self.clear_items()
-        await interaction.edit_original_response(embed=embed, view=self)
+        frames = [embed.copy()]
 
         spins = self.game.generate_spins(15)
         for spin in spins:
-            await sleep(0.05)
             embed.set_field_at(
                 0,
                 name="Slot Spin",
                 value=" ".join([self.game.symbols[s] for s in spin]),
                 inline=False,
             )
-            await interaction.edit_original_response(embed=embed, view=self)
+            frames.append(embed.copy())
+        frames.pop()  # the last spin is shown together with the result
         # check win
         final_spin_result = self.game.check_win(spins[-1])
         self.result = final_spin_result
 
-        print("Final spin result:", final_spin_result)
-        if final_spin_result == 3:
+        interaction.client.metrics.inc(
+            "bot_slots_spins_total", outcome=OUTCOMES[final_spin_result]
+        )
+        if final_spin_result == THREE_OF_A_KIND:
             embed.set_field_at(
                 1, name="Result", value="Lucky you!\nYou win 3x your bet!", inline=True
             )
             embed.color = discord.Color.green()
-            print("Win 3x")
-        elif final_spin_result == 2:
+        elif final_spin_result == PAIR:
             embed.set_field_at(
                 1, name="Result", value="You won 2x your bet!", inline=True
             )
             embed.color = discord.Color.green()
-            print("Win 2x")
         else:
             embed.set_field_at(
                 1, name="Result", value="You lost!\nBetter luck next time!", inline=True
             )
             embed.color = discord.Color.red()
-            print("Lost")
-
-        await interaction.edit_original_response(embed=embed, view=self)
-        await sleep(60)
-        try:
-            await interaction.delete_original_message()
-        except discord.NotFound:
-            pass
+        frames.append(embed)
 
+        # Spin frames are dropped if they would run into Discord's rate limits
+        await self.game.animations.play(
+            interaction.token,
+            frames,
+            lambda frame: interaction.edit_original_response(embed=frame, view=self),
+        )
+        self.end()  # the message is deleted by the timer scheduler
         self.event.set()
 
     @discord.ui.button(label="Spin", style=discord.ButtonStyle.primary)
     async def spin_slots(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
+        self.spinning = True
         await interaction.response.defer()
         await self.update_game_state(interaction)
@@ -0,0 +1,153 @@
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.mysql import insert
+
+from models.submissions import Submission
+from models.user_streak import UserStreak
+
+submissions = Submission.__table__
+user_streaks = UserStreak.__table__
+
+
+async def record_submission(conn, user_id):
+    """Advance a user's streak for a submission made today in one upsert."""
+    today = func.curdate()
+    last_day = user_streaks.c.last_submission_day
+    current = user_streaks.c.current_streak
+    new_current = case(
+        (last_day == today, current),  # already submitted today
+        (last_day == func.subdate(today, 1), current + 1),  # kept the streak going
+        else_=1,  # missed a day, start over
+    )
+    stmt = insert(user_streaks).values(
+        user_id=user_id, current_streak=1, best_streak=1, last_submission_day=today
+    )
+    # best_streak comes first and repeats the CASE so every column reads the old row
+    stmt = stmt.on_duplicate_key_update(
+        [
+            ("best_streak", func.greatest(user_streaks.c.best_streak, new_current)),
+            ("current_streak", new_current),
+            ("last_submission_day", today),
+            ("updated_at", func.now()),
+        ]
+    )
+    await conn.execute(stmt)
+
+
+async def get_streak(conn, user_id):
+    """Return the user's streak as of their last submission; 0 if they never submitted."""
+    streak = await conn.scalar(
+        select(user_streaks.c.current_streak).where(user_streaks.c.user_id == user_id)
+    )
+    return streak or 0
+
+
+async def count_submissions_today(conn, user_id):
+    """Count today's submissions for a user with one range scan on the user/time index."""
+    today = func.curdate()
+    return await conn.scalar(
+        select(func.count()).where(
+            submissions.c.user_id == user_id,
+            submissions.c.inserted_at >= today,
+            submissions.c.inserted_at < func.adddate(today, 1),
+        )
+    )
+
+
+def streak_state_query(user_id=None):
+    """Build a query giving (user_id, current_streak, best_streak, last_submission_day).
+
+    Gaps and islands: subtracting each distinct day's row number from the day
+    maps every run of consecutive days onto the same "island" date, so runs
+    are plain GROUP BYs and the latest/longest run are picked by window
+    functions. All sorting happens in MySQL.
+    """
+    day = func.date(submissions.c.inserted_at)
+    days = select(submissions.c.user_id, day.label("day")).distinct()
+    if user_id is not None:
+        days = days.where(submissions.c.user_id == user_id)
+    days = days.cte("days")
+
+    islands = select(
+        days.c.user_id,
+        days.c.day,
+        func.subdate(
+            days.c.day,
+            func.row_number().over(partition_by=days.c.user_id, order_by=days.c.day),
+        ).label("island"),
+    ).cte("islands")
+
+    runs = (
+        select(
+            islands.c.user_id,
+            func.max(islands.c.day).label("last_day"),
+            func.count().label("length"),
+        )
+        .group_by(islands.c.user_id, islands.c.island)
+        .cte("runs")
+    )
+
+    ranked = select(
+        runs.c.user_id,
+        runs.c.length,
+        runs.c.last_day,
+        func.row_number()
+        .over(partition_by=runs.c.user_id, order_by=runs.c.last_day.desc())
+        .label("recency"),
+        func.max(runs.c.length).over(partition_by=runs.c.user_id).label("best"),
+    ).subquery("ranked")
+
+    return select(
+        ranked.c.user_id,
+        ranked.c.length.label("current_streak"),
+        ranked.c.best.label("best_streak"),
+        ranked.c.last_day.label("last_submission_day"),
+    ).where(ranked.c.recency == 1)
+
+
+async def compute_streak(conn, user_id):
+    """Compute a user's streak state from raw submissions; None if they have none."""
+    return (await conn.execute(streak_state_query(user_id))).first()
+
+
+async def backfill_streaks(db, batch_size=1000):
+    """Rebuild every user's streak state from their full submission history.
+
+    The user_streaks migration seeds the table itself; run this whenever
+    the table needs repairing. MySQL computes one finished row per user; we only copy
+    them over in batches. Returns the number of users written.
+    """
+    written = 0
+    async with db.Session() as session:
+        result = await session.stream(streak_state_query())
+        async for batch in result.mappings().partitions(batch_size):
+            stmt = insert(user_streaks).values([dict(row) for row in batch])
+            stmt = stmt.on_duplicate_key_update(
+                current_streak=stmt.inserted.current_streak,
+                best_streak=stmt.inserted.best_streak,
+                last_submission_day=stmt.inserted.last_submission_day,
+                updated_at=func.now(),
+            )
+            async with db.session() as write_session:
+                await write_session.execute(stmt)
+            written += len(batch)
+    return written
+
+
+async def main():
+    from database import Database
+
+    load_dotenv()
+    db = Database(os.getenv("DATABASE_URL"))
+    try:
+        written = await backfill_streaks(db)
+        print(f"Rebuilt streaks for {written} users")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+import time
+from dataclasses import dataclass
+
+from discord import app_commands
+
+
+@dataclass(frozen=True)
+class Limit:
+    """`burst` uses at once, refilled at `rate` uses per second."""
+
+    rate: float
+    burst: int
+
+    def cooldown(self):
+        return app_commands.Cooldown(self.burst, self.burst / self.rate)
+
+
+class RateLimiter:
+    """Token buckets per (command, user) and per (command, guild).
+
+    Each bucket is stored as one float, the time at which it will be full
+    again (GCRA, the "virtual scheduling" form of a token bucket). A bucket
+    whose time has passed is the same as a full one, so it is simply
+    forgotten; stale entries are swept whenever the table has doubled since
+    the last sweep, which keeps memory proportional to recent traffic.
+    """
+
+    def __init__(self, sweep_size=4096):
+        self.buckets = {}  # (command, scope, id) -> time the bucket is full again
+        self.sweep_size = sweep_size
+        self.sweep_at = sweep_size
+        self.throttled = 0
+
+    def _check(self, key, limit, now):
+        """Return (retry_after, new full-at time) for spending a token from `key`."""
+        interval = 1 / limit.rate
+        full_at = max(self.buckets.get(key, now), now)
+        wait = full_at - now - (limit.burst - 1) * interval
+        if wait > 0:
+            return wait, None
+        return 0.0, full_at + interval
+
+    def hit(self, command, user_id, guild_id, per_user, per_guild=None, now=None):
+        """Spend a token for `user_id` (and their guild) on `command`.
+
+        Returns None if allowed, otherwise (seconds to wait, the Limit that
+        was hit). Nothing is spent when either bucket is empty.
+        """
+        now = time.monotonic() if now is None else now
+        checks = [((command, "user", user_id), per_user)]
+        if per_guild is not None and guild_id is not None:
+            checks.append(((command, "guild", guild_id), per_guild))
+
+        updates = []
+        for key, limit in checks:
+            wait, full_at = self._check(key, limit, now)
+            if wait:
+                self.throttled += 1
+                return wait, limit
+            updates.append((key, full_at))
+        for key, full_at in updates:
+            self.buckets[key] = full_at
+
+        if len(self.buckets) >= self.sweep_at:
+            self.sweep(now)
+        return None
+
+    def sweep(self, now=None):
+        """Forget every bucket that has refilled."""
+        now = time.monotonic() if now is None else now
+        self.buckets = {key: t for key, t in self.buckets.items() if t > now}
+        self.sweep_at = max(self.sweep_size, 2 * len(self.buckets))
+
+
+def throttled(limiter, per_user, per_guild=None):
+    """App command check spending from the user's and guild's buckets for the command.
+
+    Raises CommandOnCooldown, so the tree's error handler can tell the user
+    when to try again before the command body ever runs.
+    """
+
+    def predicate(interaction):
+        hit = limiter.hit(
+            interaction.command.qualified_name,
+            interaction.user.id,
+            interaction.guild_id,
+            per_user,
+            per_guild,
+        )
+        if hit is not None:
+            retry_after, limit = hit
+            raise app_commands.CommandOnCooldown(limit.cooldown(), retry_after)
+        return True
+
+    return app_commands.check(predicate)
@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import time
+
+import discord
+
+
+class TimerScheduler:
+    """One background task running every delayed job in the bot.
+
+    Timers live in a heap ordered by deadline, with a dict from key to heap
+    entry. Scheduling is O(log n); cancelling marks the entry dead in O(1)
+    and it is dropped when it reaches the top, so a reschedule is a cancel
+    plus an O(log n) push. Jobs that are waiting cost one small list each
+    instead of a sleeping coroutine.
+    """
+
+    def __init__(self):
+        self.heap = []  # [deadline, seq, key, callback]; callback None once cancelled
+        self.timers = {}  # key -> live heap entry
+        self.counter = itertools.count()  # breaks deadline ties in scheduling order
+        self.wakeup = asyncio.Event()
+        self.running = set()  # callbacks in flight, kept referenced until done
+        self.task = None
+
+    def __len__(self):
+        return len(self.timers)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def schedule(self, key, delay, callback):
+        """Run the coroutine function `callback` in `delay` seconds, replacing any timer for `key`."""
+        self.cancel(key)
+        entry = [time.monotonic() + delay, next(self.counter), key, callback]
+        self.timers[key] = entry
+        heapq.heappush(self.heap, entry)
+        if self.heap[0] is entry:
+            self.wakeup.set()  # new earliest deadline
+
+    def cancel(self, key):
+        entry = self.timers.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = None
+        if len(self.heap) > 2 * len(self.timers) + 64:
+            # mostly dead entries; rebuild so the heap stays proportional to live timers
+            self.heap = [live for live in self.heap if live[3] is not None]
+            heapq.heapify(self.heap)
+        return True
+
+    def reschedule(self, key, delay):
+        """Push an existing timer back to `delay` seconds from now."""
+        entry = self.timers.get(key)
+        if entry is None:
+            return False
+        self.schedule(key, delay, entry[3])
+        return True
+
+    def delete_later(self, key, delete, delay=60):
+        """Call `delete()` (e.g. a message's delete) in `delay` seconds."""
+
+        async def run():
+            try:
+                await delete()
+            except discord.HTTPException:
+                pass  # already deleted or the interaction expired
+
+        self.schedule(key, delay, run)
+
+    def every_day(self, key, at, callback):
+        """Run `callback` every day at `at`, a timezone-aware datetime.time."""
+        now = datetime.datetime.now(at.tzinfo)
+        next_run = datetime.datetime.combine(now.date(), at)
+        if next_run <= now:
+            next_run += datetime.timedelta(days=1)
+
+        async def run():
+            self.every_day(key, at, callback)  # book the next run first
+            await callback()
+
+        self.schedule(key, (next_run - now).total_seconds(), run)
+
+    def _fire(self, callback):
+        task = asyncio.create_task(callback())
+        self.running.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self.running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Timer job failed: {task.exception()!r}")
+
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            now = time.monotonic()
+            while self.heap and (self.heap[0][3] is None or self.heap[0][0] <= now):
+                _, _, key, callback = heapq.heappop(self.heap)
+                if callback is None:
+                    continue
+                del self.timers[key]
+                self._fire(callback)
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,117 @@
+import sys
+from collections import OrderedDict
+
+
+def _sizeof(obj):
+    """Rough size of an object and the values it holds directly."""
+    attrs = getattr(obj, "__dict__", {})
+    return (
+        sys.getsizeof(obj)
+        + sys.getsizeof(attrs)
+        + sum(sys.getsizeof(value) for value in attrs.values())
+    )
+
+
+class ViewRegistry:
+    """Every live interactive view, with a per-user cap, LRU eviction and idle expiry.
+
+    Views are registered with the user they belong to and a callable that
+    deletes their message. Games and menus are capped separately per user,
+    so opening menus never pushes out a game in progress. A view that sits idle for `idle_timeout`
+    seconds, or gets pushed out by the user's cap or the global cap, is
+    stopped, gets its `on_timeout` (games settle there) and its message is
+    deleted. Stopping the view removes it from discord.py's view store, so
+    an abandoned menu can't keep itself or its game alive.
+    """
+
+    def __init__(self, timers, per_user=3, max_views=2000, idle_timeout=180):
+        self.timers = timers
+        self.per_user = per_user
+        self.max_views = max_views
+        self.idle_timeout = idle_timeout
+        # view -> ((user_id, kind), delete), least recently used first
+        self.views = OrderedDict()
+        self.by_user = {}  # (user_id, kind) -> OrderedDict of those views
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.views)
+
+    def track(self, view, user_id, delete, kind="menu"):
+        """Start managing a view whose message `delete()` removes.
+
+        `kind` picks the per-user cap the view counts against: "menu" or "game".
+        """
+        key = (user_id, kind)
+        self.views[view] = (key, delete)
+        users = self.by_user.setdefault(key, OrderedDict())
+        users[view] = None
+        self.timers.schedule(
+            ("view", view), self.idle_timeout, lambda: self._expire(view)
+        )
+
+        for old in list(users)[: max(len(users) - self.per_user, 0)]:
+            self._evict(old)
+        for old in list(self.views)[: max(len(self.views) - self.max_views, 0)]:
+            self._evict(old)
+
+    def touch(self, view):
+        """Mark a view as used now, pushing back its idle expiry."""
+        if view not in self.views:
+            return
+        key, _ = self.views[view]
+        self.views.move_to_end(view)
+        self.by_user[key].move_to_end(view)
+        self.timers.reschedule(("view", view), self.idle_timeout)
+
+    def release(self, view, delete_after=60):
+        """Stop managing a finished view; its message goes after `delete_after` seconds."""
+        if view not in self.views:
+            return
+        delete = self._drop(view)
+        view.stop()  # drops it from discord.py's view store
+        if delete_after is not None:
+            self.timers.delete_later(("delete", view), delete, delete_after)
+
+    def stats(self):
+        """Live view count and a rough size of the views and their games in bytes."""
+        size = 0
+        for view in self.views:
+            size += _sizeof(view) + sum(_sizeof(item) for item in view.children)
+            game = getattr(view, "game", None)
+            if game is not None:
+                size += _sizeof(game)
+        return {
+            "live": len(self.views),
+            "users": len({user_id for user_id, _ in self.by_user}),
+            "bytes": size,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def _drop(self, view):
+        key, delete = self.views.pop(view)
+        users = self.by_user[key]
+        del users[view]
+        if not users:
+            del self.by_user[key]
+        self.timers.cancel(("view", view))
+        return delete
+
+    def _evict(self, view):
+        self.evicted += 1
+        # free the slot now; the view is shut down on the timer task
+        delete = self._drop(view)
+        self.timers.schedule(("view", view), 0, lambda: self._shut_down(view, delete))
+
+    async def _expire(self, view):
+        if view not in self.views:
+            return
+        self.expired += 1
+        await self._shut_down(view, self._drop(view))
+
+    async def _shut_down(self, view, delete):
+        view.stop()
+        await view.on_timeout()
+        self.timers.delete_later(("delete", view), delete, 0)
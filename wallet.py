@@ -0,0 +1,75 @@
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models.gold_ledger import GoldLedger
+from models.user_gold import UserGold
+
+user_gold = UserGold.__table__
+gold_ledger = GoldLedger.__table__
+
+# Why gold moved; every ledger row carries one of these
+REASONS = (
+    "submission",
+    "roll",
+    "slots",
+    "blackjack",
+    "high-low",
+    "combine",
+    "admin",
+)
+
+
+# Every statement below stores the new balance through LAST_INSERT_ID(expr).
+# MySQL hands that value back in the OK packet, so the driver exposes it as
+# lastrowid and we get the updated balance without a follow-up SELECT.
+# user_gold is the materialized balance; gold_ledger records each change in
+# the same transaction, so the two can't drift apart.
+
+
+async def _record(conn, user_id, amount, reason, balance):
+    if reason not in REASONS:
+        raise ValueError(f"Unknown gold ledger reason {reason!r}")
+    await conn.execute(
+        insert(gold_ledger).values(
+            user_id=user_id, amount=amount, reason=reason, balance_after=balance
+        )
+    )
+
+
+async def credit(conn, user_id, amount, reason):
+    """Add gold to a wallet, creating it if needed, and return the new balance."""
+    if amount < 0:
+        raise ValueError("credit amount must not be negative")
+    stmt = (
+        mysql_insert(user_gold)
+        .values(user_id=user_id, gold=func.last_insert_id(amount))
+        .on_duplicate_key_update(
+            gold=func.last_insert_id(func.coalesce(user_gold.c.gold, 0) + amount)
+        )
+    )
+    result = await conn.execute(stmt)
+    balance = result.lastrowid
+    await _record(conn, user_id, amount, reason, balance)
+    return balance
+
+
+async def debit(conn, user_id, amount, reason):
+    """Take gold from a wallet if it holds enough.
+
+    Returns the new balance, or None when the balance is too low. The check and
+    the write happen in the same UPDATE, so concurrent debits can never push a
+    wallet below zero.
+    """
+    if amount < 0:
+        raise ValueError("debit amount must not be negative")
+    stmt = (
+        update(user_gold)
+        .where(user_gold.c.user_id == user_id, user_gold.c.gold >= amount)
+        .values(gold=func.last_insert_id(user_gold.c.gold - amount))
+    )
+    result = await conn.execute(stmt)
+    if result.rowcount != 1:
+        return None
+    balance = result.lastrowid
+    await _record(conn, user_id, -amount, reason, balance)
+    return balance